@@ -0,0 +1,157 @@
+"""
+Agregasi hasil per bank x tahun: jumlah file, total kata, hit keyword, dan densitas keyword
+per 10.000 kata, sehingga perbandingan year-over-year tidak perlu dibangun ulang dari CSV.
+
+Agregat di-update per file (YearlyAggregate.add) begitu hasilnya selesai; tabel dan pivot
+dihitung dari grup bank x tahun, bukan dari semua baris file.
+"""
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Iterable, IO, TYPE_CHECKING
+
+import logic
+
+# numpy/pandas di-import saat dipakai: cli dan jobs meng-import modul ini, dan import pandas
+# (~0.4 detik) tidak boleh ikut dibayar oleh CLI maupun worker process pool saat startup
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# KONFIGURASI AGREGASI
+# Densitas keyword = hit per DENSITY_WORDS kata
+DENSITY_WORDS = 10_000
+DENSITY_SUFFIX = " per 10k"
+# density: hit per 10k kata, count: jumlah hit, yoy: selisih densitas dengan tahun laporan sebelumnya
+PIVOT_VALUES = ("density", "count", "yoy")
+# Kolom dasar tiap grup, diikuti satu kolom hit per kategori.
+# File Parsial (sebagian halaman gagal diekstrak) tetap masuk Jumlah File, kata, dan hit;
+# kolomnya menandai grup yang hitungannya belum lengkap.
+BASE_COLUMNS = ["Jumlah File", "File Dilewati", "File Parsial", "Total Kata Dokumen"]
+
+_SUCCESS = "SUCCESS"
+_SKIPPED = "SKIPPED (Scan)"
+_PARTIAL = "PARTIAL (Halaman Gagal)"
+_WORDS = BASE_COLUMNS.index("Total Kata Dokumen")
+_HITS = len(BASE_COLUMNS)
+
+
+def _year_order(year: str) -> Tuple[bool, str]:
+    # Tahun numerik urut naik, "Unknown" (tidak ada tahun di nama file/arsip) paling akhir
+    return (not year.isdigit(), year)
+
+
+class YearlyAggregate:
+    """
+    Akumulator per (bank, tahun). Tiap grup satu vektor int64 [file, file dilewati, file parsial,
+    total kata, hit per kategori], jadi add() hanya satu penjumlahan vektor. Dipakai bersamaan oleh thread
+    pengumpul hasil (result_callback) dan thread UI yang membaca ringkasan.
+    Baris ERROR tidak punya bank/tahun/hitungan dan tidak ikut diagregasi.
+    """
+
+    def __init__(self, keyword_headers: Optional[List[str]] = None):
+        self.keyword_headers = list(logic.BASE_PATTERNS.keys()) if keyword_headers is None else list(keyword_headers)
+        self.rows = 0
+        self._groups: Dict[Tuple[str, str], "np.ndarray"] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]], keyword_headers: Optional[List[str]] = None) -> "YearlyAggregate":
+        aggregate = cls(keyword_headers)
+        for row in rows:
+            aggregate.add(row)
+        return aggregate
+
+    def add(self, row: Dict[str, Any]) -> None:
+        status = row.get("Status")
+        if status not in (_SUCCESS, _SKIPPED, _PARTIAL):
+            return
+        import numpy as np
+        vector = np.zeros(len(BASE_COLUMNS) + len(self.keyword_headers), dtype=np.int64)
+        if status == _SKIPPED:
+            vector[1] = 1
+        else:
+            vector[0] = 1
+            vector[2] = status == _PARTIAL
+            vector[_WORDS] = int(row.get("Total Kata Dokumen", 0) or 0)
+            vector[_HITS:] = [int(row.get(kw, 0) or 0) for kw in self.keyword_headers]
+        key = (str(row.get("Nama Bank", "")), str(row.get("Tahun", "Unknown")))
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                self._groups[key] = vector
+            else:
+                group += vector
+            self.rows += 1
+
+    def table(self) -> "pd.DataFrame":
+        """
+        Satu baris per (Nama Bank, Tahun): jumlah file, total kata, hit per kategori, lalu
+        densitas per kategori (kolom "<kategori> per 10k"; NaN jika grup tanpa kata).
+        """
+        import numpy as np
+        import pandas as pd
+
+        with self._lock:
+            keys = sorted(self._groups, key=lambda key: (key[0], _year_order(key[1])))
+            matrix = np.vstack([self._groups[key] for key in keys]) if keys else np.zeros((0, len(BASE_COLUMNS) + len(self.keyword_headers)), dtype=np.int64)
+        words = matrix[:, _WORDS:_WORDS + 1].astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            density = np.where(words > 0, matrix[:, _HITS:] * DENSITY_WORDS / words, np.nan)
+        index = pd.MultiIndex.from_tuples(keys, names=["Nama Bank", "Tahun"])
+        return pd.concat([
+            pd.DataFrame(matrix, index=index, columns=BASE_COLUMNS + self.keyword_headers),
+            pd.DataFrame(density, index=index, columns=[f"{kw}{DENSITY_SUFFIX}" for kw in self.keyword_headers]),
+        ], axis=1)
+
+
+def table_categories(table: "pd.DataFrame") -> List[str]:
+    return [col[:-len(DENSITY_SUFFIX)] for col in table.columns if col.endswith(DENSITY_SUFFIX)]
+
+
+def _yoy_row(row: "pd.Series") -> "pd.Series":
+    # Selisih dengan tahun laporan sebelumnya milik bank ini sendiri: tahun yang tidak
+    # dilaporkan bank ini (tapi ada di bank lain) dilewati, bukan membuat selisihnya NaN
+    return row.dropna().diff().reindex(row.index)
+
+
+def pivot(table: "pd.DataFrame", category: str, value: str = "density") -> "pd.DataFrame":
+    """Bank x tahun untuk satu kategori dari YearlyAggregate.table(); `value` salah satu PIVOT_VALUES."""
+    if value not in PIVOT_VALUES:
+        raise ValueError(f"Nilai pivot tidak dikenal: {value} (pilih {', '.join(PIVOT_VALUES)})")
+    column = category if value == "count" else f"{category}{DENSITY_SUFFIX}"
+    result = table[column].unstack("Tahun")
+    result = result[sorted(result.columns, key=_year_order)]
+    result.columns.name = "Tahun"
+    if value == "yoy":
+        # Selisih hanya antar tahun yang diketahui; kolom "Unknown" tidak punya tahun sebelumnya
+        years = [year for year in result.columns if year.isdigit()]
+        result = result[years].apply(_yoy_row, axis=1).reindex(columns=result.columns)
+    return result
+
+
+def pivot_all(table: "pd.DataFrame", value: str = "density") -> "pd.DataFrame":
+    """Semua kategori dalam satu pivot: indeks (Nama Bank, Kategori), kolom tahun. Bentuk ekspor."""
+    import pandas as pd
+
+    categories = table_categories(table)
+    if table.empty or not categories:
+        return pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=["Nama Bank", "Kategori"]))
+    combined = pd.concat({category: pivot(table, category, value) for category in categories}, names=["Kategori"])
+    # Urut per bank, kategori mengikuti urutan dictionary keyword
+    combined = combined.swaplevel(0, 1)
+    order = {category: i for i, category in enumerate(categories)}
+    return combined.sort_index(level=[0, 1], key=lambda level: level.map(order) if level.name == "Kategori" else level)
+
+
+def write_pivot_csv(table: "pd.DataFrame", output: IO[str], value: str = "density") -> int:
+    """
+    Tulis pivot_all sebagai CSV (densitas dibulatkan 4 desimal, sel kosong = tidak ada laporan).
+    Returns: jumlah baris data.
+    """
+    result = pivot_all(table, value)
+    result.round(4).to_csv(output, lineterminator="\n")
+    return len(result)
+
+
+def write_table_csv(table: "pd.DataFrame", output: IO[str]) -> int:
+    table.round(4).to_csv(output, lineterminator="\n")
+    return len(table)
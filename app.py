@@ -1,8 +1,32 @@
+import io
+import hashlib
 import streamlit as st
 import pandas as pd
+import numpy as np
 import styles
 import logic
-from typing import Dict, Any, List
+import jobs
+import kwic
+import aggregate
+from typing import Dict, Any, List, Tuple
+
+logic.configure_logging()
+
+KWIC_RESULT_LIMIT = 500
+# Label pilihan nilai pivot di bagian Year-over-Year
+PIVOT_VALUE_LABELS = {"density": "Per 10k kata", "count": "Jumlah hit", "yoy": "Perubahan YoY (per 10k)"}
+# Jumlah kartu file per halaman di File Breakdown
+CARDS_PER_PAGE = 30
+
+SKIPPED_CARD_HTML = """
+<div class="file-card" style="border: 1px dashed #ccc; opacity: 0.6;">
+    <div class="fc-header" title="{bank}">{bank}</div>
+    <div class="fc-sub">{year} • {short_name}...</div>
+    <div style="margin-top:20px; text-align:center; font-style:italic;">
+        ⚠️ Skipped (Scanned File)
+    </div>
+</div>
+"""
 
 # Konfigurasi Awal
 def configure_page() -> None:
@@ -19,11 +43,49 @@ def init_session_state() -> None:
     if 'step' not in st.session_state: st.session_state.step = 1
     if 'zip_name' not in st.session_state: st.session_state.zip_name = ""
     if 'analysis_results' not in st.session_state: st.session_state.analysis_results = []
+    if 'keyword_columns' not in st.session_state: st.session_state.keyword_columns = list(logic.BASE_PATTERNS.keys())
+    if 'matcher_signature' not in st.session_state: st.session_state.matcher_signature = None
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = None
+        # Sesi baru (refresh / koneksi putus) dengan ?job=<id> di URL: buka kembali job tersebut
+        job_id = st.query_params.get("job")
+        if job_id and not load_job(job_id):
+            st.query_params.clear()
+
+def load_job(job_id: str) -> bool:
+    """Muat job dari job store ke session. Job yang sudah selesai langsung ke halaman hasil."""
+    job = jobs.get_job_store().get_job(job_id)
+    if job is None:
+        return False
+    st.session_state.job_id = job_id
+    st.session_state.zip_name = job["zip_name"]
+    matcher = jobs.job_matcher(job)
+    st.session_state.keyword_columns = matcher.categories
+    # Hanya job dengan indeks KWIC yang menampilkan pencarian konteks di halaman hasil
+    st.session_state.matcher_signature = matcher.signature if job["options"].get("index_context") else None
+    if job["status"] == "done":
+        st.session_state.analysis_results = jobs.get_job_store().load_results(job_id)
+        st.session_state.step = 3
+    else:
+        st.session_state.step = 2
+    return True
 
 def reset_app() -> None:
     st.session_state.step = 1
     st.session_state.zip_name = ""
     st.session_state.analysis_results = []
+    st.session_state.keyword_columns = list(logic.BASE_PATTERNS.keys())
+    st.session_state.matcher_signature = None
+    st.session_state.job_id = None
+    st.query_params.clear()
+    st.rerun()
+
+def submit_job(job_id: str, use_cache: bool = True) -> None:
+    """Jalankan job di background (antrean bersama semua sesi); halaman upload memantau progresnya."""
+    jobs.get_job_scheduler().submit(job_id, use_cache)
+    st.session_state.job_id = job_id
+    # job_id di URL: refresh / sesi baru bisa membuka progres dan hasil job ini
+    st.query_params["job"] = job_id
     st.rerun()
 
 # Fungsi Render Halaman
@@ -43,86 +105,352 @@ def render_landing_page() -> None:
             st.session_state.step = 2
             st.rerun()
 
+@st.fragment(run_every=2)
+def render_job_status(job_id: str) -> None:
+    """Polling status job background; pindah ke halaman hasil begitu job selesai."""
+    job = jobs.get_job_store().get_job(job_id)
+    if job is None:
+        return
+    if job["status"] == "done":
+        load_job(job_id)
+        st.rerun()
+    
+    state = jobs.get_job_scheduler().status(job_id)
+    if state["state"] == "queued":
+        st.info(f"⏳ {job['zip_name']}: menunggu giliran (antrean ke-{state['position']}). Halaman ini boleh ditutup, progres tersimpan.")
+    elif state["state"] == "running":
+        current, total, filename = state["progress"] or (job["done"], job["total"], "")
+        st.progress(int((current / total) * 100) if total else 0)
+        clean_name = filename.split('/')[-1]
+        st.text(f"Processing ({current}/{total}): {clean_name}" if clean_name else f"Processing ({current}/{total})")
+        summary = state.get("aggregate")
+        if summary is not None and summary.rows:
+            # Agregat di-update per file selesai; polling hanya membaca grup bank x tahun
+            table = summary.table()
+            st.caption("Ringkasan sementara per bank x tahun (keyword per 10k kata)")
+            st.dataframe(
+                table[["Jumlah File", "Total Kata Dokumen"] + [f"{kw}{aggregate.DENSITY_SUFFIX}" for kw in summary.keyword_headers]].round(2),
+                use_container_width=True
+            )
+    else:
+        message = f"Job {job['zip_name']} berhenti ({job['status']}, {job['done']}/{job['total']} file)"
+        st.warning(message + (f": {job['error']}" if job["error"] else ". Lanjutkan dari Riwayat Job."))
+
 def render_upload_page() -> None:
     st.markdown("## Upload Reports (ZIP)")
-    st.markdown("<p style='text-align:center; opacity:0.7'>Upload a .zip file containing PDF/DOCX annual reports.</p>", unsafe_allow_html=True)
+    st.markdown("<p style='text-align:center; opacity:0.7'>Upload one or more .zip / .tar.gz files containing annual reports (PDF, DOCX, DOC, XLSX, PPTX, HTML, TXT) (nested per-bank archives are supported).</p>", unsafe_allow_html=True)
+    
+    if st.session_state.job_id:
+        render_job_status(st.session_state.job_id)
     
-    uploaded_zip = st.file_uploader(
+    uploaded_zips = st.file_uploader(
         label="Upload Annual Reports (ZIP format)", 
-        type=['zip'], 
+        type=['zip', 'tar', 'gz', 'tgz'], 
+        accept_multiple_files=True,
         label_visibility="collapsed"
     )
     
-    c_opt1, c_opt2 = st.columns(2)
+    c_opt1, c_opt2, c_opt3 = st.columns(3)
     with c_opt1:
         is_bilingual = st.checkbox("Enable Bilingual Search (Indonesia + English)", value=False)
     with c_opt2:
         include_scanned = st.checkbox(
             "Sertakan Dokumen Scan (OCR)", 
             value=False, 
-            help="Jika dicentang, file PDF scan (gambar) akan diproses OCR (Maks 50 halaman pertama) dengan peningkatan kualitas gambar (DPI 300 + Sharpening)."
+            help="Jika dicentang, halaman PDF scan (gambar) akan diproses OCR secara adaptif: render cepat 200 DPI, halaman dengan confidence OCR rendah diulang dengan peningkatan kualitas gambar (DPI 300 + Sharpening). Dokumen scan penuh: maks 50 halaman pertama. Dokumen campuran: hanya halaman tanpa teks yang di-OCR."
+        )
+    with c_opt3:
+        use_cache = st.checkbox(
+            "Gunakan Cache Hasil",
+            value=True,
+            help="File yang pernah diproses (isi identik) diambil dari cache tanpa ekstraksi/OCR ulang. Matikan untuk memaksa proses ulang."
+        )
+        index_context = st.checkbox(
+            "Simpan Konteks Keyword (KWIC)",
+            value=True,
+            help="Catat posisi dan kalimat di sekitar setiap keyword, sehingga di halaman hasil bisa dicari mis. di mana Bank X menyebut Blockchain pada 2021."
         )
     
-    if uploaded_zip:
-        st.session_state.zip_name = uploaded_zip.name
+    matcher = None
+    with st.expander("📚 Custom Keyword Dictionary (opsional)"):
+        st.markdown(
+            "Upload file YAML/JSON berisi `categories: {Nama Kategori: [term, ...]}` "
+            "untuk mengganti daftar keyword bawaan. Opsi bilingual diabaikan jika dictionary dipakai."
+        )
+        dictionary_file = st.file_uploader(
+            label="Keyword Dictionary",
+            type=['yaml', 'yml', 'json'],
+            label_visibility="collapsed"
+        )
+        if dictionary_file:
+            try:
+                matcher = logic.load_keyword_dictionary(dictionary_file.getvalue(), dictionary_file.name)
+                st.success(f"Dictionary '{matcher.name}': {len(matcher.categories)} kategori, {matcher.term_count} term.")
+            except (ValueError, ImportError) as e:
+                st.error(f"Dictionary tidak valid: {e}")
+                return
+    
+    if uploaded_zips:
+        st.session_state.zip_name = uploaded_zips[0].name
         st.write("")
         col_c1, col_c2, col_c3 = st.columns([1, 2, 1])
         
         with col_c2:
             if st.button("🚀 Process Files", use_container_width=True):
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                def update_progress(current, total, filename):
-                    percent = int((current / total) * 100)
-                    progress_bar.progress(percent)
-                    clean_name = filename.split('/')[-1]
-                    status_text.text(f"Processing ({current}/{total}): {clean_name}")
-
                 try:
-                    results = logic.process_zip_file(
-                        uploaded_zip, 
-                        is_bilingual, 
-                        include_scanned,
-                        progress_callback=update_progress
-                    )
-                    
-                    st.session_state.analysis_results = results
-                    st.session_state.step = 3
-                    st.rerun()
+                    options = jobs.job_options(matcher or logic.get_keyword_matcher(is_bilingual), include_scanned, index_context)
+                    # Beberapa arsip sekaligus = satu job (hasil digabung di satu tabel)
+                    job_id = jobs.create_job(uploaded_zips, options, fresh=not use_cache)
                 except Exception as e:
                     st.error(f"Terjadi kesalahan fatal: {str(e)}")
+                    return
+                submit_job(job_id, use_cache)
+
+    render_job_history()
 
     st.write("")
     if st.button("Cancel"):
         reset_app()
 
-def render_results_page() -> None:
-    st.markdown("## Analysis Complete")
-    results = st.session_state.analysis_results
-    
-    if not results:
-        st.warning("Tidak ada file valid yang ditemukan atau diproses.")
-        if st.button("📂 Start Over"): reset_app()
+def render_job_history() -> None:
+    """Daftar job terakhir dari job store: lanjutkan job yang terputus atau buka hasil job selesai."""
+    recent_jobs = jobs.get_job_store().list_jobs()
+    if not recent_jobs:
         return
+    st.write("")
+    scheduler = jobs.get_job_scheduler()
+    # Buka otomatis jika job sesi ini berhenti di tengah jalan (perlu dilanjutkan manual)
+    expanded = any(
+        job["job_id"] == st.session_state.job_id and job["status"] != "done" and not scheduler.status(job["job_id"])["state"]
+        for job in recent_jobs
+    )
+    with st.expander("🕘 Riwayat Job", expanded=expanded):
+        for job in recent_jobs:
+            state = scheduler.status(job["job_id"])["state"]
+            c_info, c_action = st.columns([3, 1])
+            with c_info:
+                st.markdown(
+                    f"**{job['zip_name']}** · `{state or job['status']}` · {job['done']}/{job['total']} file"
+                    + (f" · {job['error']}" if job["error"] and not state else "")
+                )
+            with c_action:
+                if job["status"] == "done":
+                    if st.button("Lihat Hasil", key=f"open_{job['job_id']}", use_container_width=True):
+                        load_job(job["job_id"])
+                        st.query_params["job"] = job["job_id"]
+                        st.rerun()
+                elif state:
+                    # Job sedang berjalan/menunggu (mungkin dari sesi lain): cukup pantau progresnya
+                    if st.button("Pantau", key=f"watch_{job['job_id']}", use_container_width=True):
+                        st.session_state.job_id = job["job_id"]
+                        st.query_params["job"] = job["job_id"]
+                        st.rerun()
+                elif st.button("Lanjutkan", key=f"resume_{job['job_id']}", use_container_width=True):
+                    submit_job(job["job_id"])
 
-    df = pd.DataFrame(results)
-    keyword_cols = list(logic.BASE_PATTERNS.keys())
+@st.fragment
+def render_kwic_search(df: pd.DataFrame, keyword_cols: List[str]) -> None:
+    """Cari kemunculan keyword beserta konteksnya dari indeks KWIC (tanpa membuka ulang dokumen)."""
+    index = kwic.get_kwic_index()
+    if index is None:
+        return
+    st.markdown("### 🧭 Keyword in Context")
+    banks = sorted(df["Nama Bank"].dropna().unique()) if "Nama Bank" in df.columns else []
+    years = sorted(df["Tahun"].dropna().unique()) if "Tahun" in df.columns else []
+    c_bank, c_year, c_kw, c_text = st.columns(4)
+    with c_bank:
+        bank = st.selectbox("Bank", ["Semua"] + banks)
+    with c_year:
+        year = st.selectbox("Tahun", ["Semua"] + years)
+    with c_kw:
+        category = st.selectbox("Keyword", ["Semua"] + keyword_cols)
+    with c_text:
+        text = st.text_input("Filter teks", placeholder="mis. platform")
     
-    df_success = df[df["Status"] != "SKIPPED (Scan)"]
+    # Indeks berisi semua laporan yang pernah diproses: batasi ke file job ini. Job lama (sebelum
+    # file dicatat per job) hanya bisa dibatasi ke bank di batch ini.
+    job_id = st.session_state.job_id
+    batch = job_id if job_id and index.has_batch(job_id) else None
+    hits = index.query(
+        category=None if category == "Semua" else category,
+        bank=banks if bank == "Semua" else bank,
+        batch=batch,
+        year=None if year == "Semua" else year,
+        text=text or None,
+        signature=st.session_state.matcher_signature,
+        limit=KWIC_RESULT_LIMIT
+    )
+    if not hits:
+        st.info("Tidak ada kemunculan yang cocok.")
+        return
+    st.caption(f"Menampilkan {len(hits)} kemunculan" + (f" (maks. {KWIC_RESULT_LIMIT})" if len(hits) >= KWIC_RESULT_LIMIT else ""))
+    st.dataframe(pd.DataFrame([
+        {
+            "Bank": hit["bank"],
+            "Tahun": hit["year"],
+            "File": hit["filename"].split('/')[-1],
+            "Hal.": hit["page"],
+            "Keyword": hit["category"],
+            "Konteks": f"…{hit['left_context']} [{hit['term']}] {hit['right_context']}…",
+        }
+        for hit in hits
+    ]), use_container_width=True, hide_index=True)
+
+def results_cache_key(job_id: str, keyword_cols: List[str], results: List[Dict[str, Any]]) -> str:
+    """
+    Key cache prepare_results: job id + sidik jari isi baris (file, status, hitungan), sehingga
+    job yang diproses ulang / dilanjutkan dengan jumlah baris yang sama tetap dihitung ulang.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for row in results:
+        fields = [row.get("Nama File"), row.get("Status"), row.get("Total Kata Dokumen")] + [row.get(col) for col in keyword_cols]
+        digest.update(repr(fields).encode("utf-8"))
+    return f"{job_id or ''}:{len(results)}:{digest.hexdigest()}"
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def prepare_results(cache_key: str, keyword_cols: Tuple[str, ...], _results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Semua turunan hasil (DataFrame, agregat, HTML kartu, file ekspor) dihitung sekali per
+    job; rerun Streamlit berikutnya (pindah halaman, filter, KWIC) memakai hasil cache.
+    `_results` tidak di-hash, cache_key (lihat results_cache_key) yang menentukan isi cache.
+    """
+    df = pd.DataFrame(_results)
+    keyword_cols = list(keyword_cols)
+    # Baris ERROR tidak punya kolom keyword; pastikan kolomnya ada agar agregasi tidak gagal
+    for col in keyword_cols:
+        df[col] = df[col].fillna(0).astype(int) if col in df.columns else 0
     
-    total_files = len(results)
-    total_processed = len(df_success)
+    is_skipped = (df["Status"] == "SKIPPED (Scan)").to_numpy()
+    df_success = df[~is_skipped]
     
-    if not df_success.empty:
+    if not df_success.empty and keyword_cols:
         total_keyword_hits = df_success[keyword_cols].sum().sort_values(ascending=False)
-        top_keyword = total_keyword_hits.index[0] if not total_keyword_hits.empty else "None"
-        top_keyword_count = total_keyword_hits.iloc[0] if not total_keyword_hits.empty else 0
-        total_words_scanned = df_success["Total Kata Dokumen"].sum()
+        top_keyword = total_keyword_hits.index[0]
+        top_keyword_count = int(total_keyword_hits.iloc[0])
+        total_words_scanned = int(df_success["Total Kata Dokumen"].sum())
     else:
         top_keyword = "N/A"
         top_keyword_count = 0
-        total_words_scanned = 0
+        total_words_scanned = int(df_success["Total Kata Dokumen"].sum()) if not df_success.empty else 0
+    
+    # Top keyword per file sekaligus untuk semua baris (argmax = kolom pertama jika seri, sama dengan idxmax)
+    if keyword_cols:
+        values = df[keyword_cols].to_numpy()
+        file_top_kw = np.asarray(keyword_cols, dtype=object)[values.argmax(axis=1)]
+        file_top_count = values.max(axis=1)
+    else:
+        file_top_kw = np.full(len(df), "N/A", dtype=object)
+        file_top_count = np.zeros(len(df), dtype=int)
+    
+    banks = df["Nama Bank"].fillna("").astype(str).tolist() if "Nama Bank" in df.columns else [""] * len(df)
+    years = df["Tahun"].fillna("").astype(str).tolist() if "Tahun" in df.columns else [""] * len(df)
+    filenames = df["Nama File"].fillna("").astype(str).tolist()
+    cards = [
+        SKIPPED_CARD_HTML.format(bank=bank, year=year, short_name=filename[:15]) if skipped
+        else styles.render_file_card(
+            bank=bank,
+            year=year,
+            filename=filename,
+            total_words=int(total_words),
+            top_keyword=top_kw,
+            top_count=int(top_count)
+        )
+        for bank, year, filename, total_words, skipped, top_kw, top_count in zip(
+            banks, years, filenames, df["Total Kata Dokumen"].fillna(0), is_skipped, file_top_kw, file_top_count
+        )
+    ]
+    
+    yearly = aggregate.YearlyAggregate.from_rows(_results, keyword_cols).table()
+    pivot_buffer = io.StringIO()
+    aggregate.write_pivot_csv(yearly, pivot_buffer)
+    yearly_buffer = io.StringIO()
+    aggregate.write_table_csv(yearly, yearly_buffer)
+    
+    parquet_data = None
+    if logic.parquet_available():
+        parquet_buffer = io.BytesIO()
+        logic.write_parquet_output(_results, parquet_buffer, keyword_cols, logic.has_duplicate_columns(_results))
+        parquet_data = parquet_buffer.getvalue()
+    
+    return {
+        "df": df,
+        "total_files": len(df),
+        "total_processed": len(df_success),
+        "top_keyword": top_keyword,
+        "top_keyword_count": top_keyword_count,
+        "total_words_scanned": total_words_scanned,
+        # Teks pencarian kartu (bank + nama file), dicocokkan tanpa loop per rerun
+        "card_search": pd.Series([f"{b} {f}".lower() for b, f in zip(banks, filenames)]),
+        "cards": cards,
+        "yearly": yearly,
+        "pivot_csv": pivot_buffer.getvalue(),
+        "yearly_csv": yearly_buffer.getvalue(),
+        "csv": logic.generate_csv_output(_results, keyword_cols),
+        "parquet": parquet_data,
+        "metrics_summary": logic.summarize_metrics(_results),
+        "metrics_json": logic.export_metrics_json(_results),
+    }
+
+@st.fragment
+def render_file_breakdown(prepared: Dict[str, Any]) -> None:
+    """Kartu per file dipaginasi; pindah halaman / filter hanya me-rerun fragment ini."""
+    st.markdown("### 📂 File Breakdown")
+    cards = prepared["cards"]
+    c_search, c_page = st.columns([3, 1])
+    with c_search:
+        query = st.text_input("Cari bank / file", placeholder="Filter kartu berdasarkan nama bank atau file", label_visibility="collapsed")
+    if query:
+        matches = prepared["card_search"].str.contains(query.lower(), regex=False).to_numpy()
+        cards = [card for card, keep in zip(cards, matches) if keep]
+    
+    total_pages = max(1, -(-len(cards) // CARDS_PER_PAGE))
+    with c_page:
+        page = st.number_input("Halaman", min_value=1, max_value=total_pages, value=1, label_visibility="collapsed") if total_pages > 1 else 1
+    
+    first = (page - 1) * CARDS_PER_PAGE
+    page_cards = cards[first:first + CARDS_PER_PAGE]
+    if total_pages > 1 or query:
+        st.caption(f"Menampilkan {first + 1 if page_cards else 0}-{first + len(page_cards)} dari {len(cards)} file (halaman {page}/{total_pages})")
+    
+    cols = st.columns(3)
+    for i, card_html in enumerate(page_cards):
+        with cols[i % 3]:
+            st.markdown(card_html, unsafe_allow_html=True)
+
+@st.fragment
+def render_yearly_trends(prepared: Dict[str, Any], keyword_cols: List[str]) -> None:
+    """Pivot bank x tahun per kategori dari agregat yang sudah di-cache; ganti pilihan hanya me-rerun fragment ini."""
+    yearly = prepared["yearly"]
+    if yearly.empty or not keyword_cols:
+        return
+    st.markdown("### 📈 Year-over-Year")
+    c_kw, c_value = st.columns([1, 2])
+    with c_kw:
+        category = st.selectbox("Kategori", keyword_cols, key="yoy_category")
+    with c_value:
+        value = st.radio("Nilai", list(PIVOT_VALUE_LABELS), format_func=PIVOT_VALUE_LABELS.get, horizontal=True, key="yoy_value")
+    st.dataframe(aggregate.pivot(yearly, category, value).round(2), use_container_width=True)
+    
+    density = aggregate.pivot(yearly, category, "density")
+    years = [year for year in density.columns if year.isdigit()]
+    if len(years) > 1:
+        st.line_chart(density[years].T)
+
+def render_results_page() -> None:
+    st.markdown("## Analysis Complete")
+    results = st.session_state.analysis_results
+    
+    if not results:
+        st.warning("Tidak ada file valid yang ditemukan atau diproses.")
+        if st.button("📂 Start Over"): reset_app()
+        return
+
+    keyword_cols = st.session_state.keyword_columns
+    cache_key = results_cache_key(st.session_state.job_id, keyword_cols, results)
+    prepared = prepare_results(cache_key, tuple(keyword_cols), results)
+    df = prepared["df"]
+    total_files = prepared["total_files"]
+    total_processed = prepared["total_processed"]
 
     st.markdown(f"""
     <div class="metric-container">
@@ -133,12 +461,12 @@ def render_results_page() -> None:
         </div>
         <div class="metric-card">
             <div class="metric-label">Global Top Topic</div>
-            <div class="metric-value" style="font-size: 2.5rem;">{top_keyword}</div>
-            <div class="metric-sub">{top_keyword_count} occurrences</div>
+            <div class="metric-value" style="font-size: 2.5rem;">{prepared["top_keyword"]}</div>
+            <div class="metric-sub">{prepared["top_keyword_count"]} occurrences</div>
         </div>
         <div class="metric-card">
             <div class="metric-label">Total Words</div>
-            <div class="metric-value" style="font-size: 2.5rem;">{total_words_scanned:,}</div>
+            <div class="metric-value" style="font-size: 2.5rem;">{prepared["total_words_scanned"]:,}</div>
             <div class="metric-sub">Across valid files</div>
         </div>
     </div>
@@ -146,62 +474,84 @@ def render_results_page() -> None:
     
     st.divider()
     
-    st.markdown("### 📂 File Breakdown")
-    cols = st.columns(3)
-    
-    for i, row in df.iterrows():
-        with cols[i % 3]:
-            if row['Status'] == 'SKIPPED (Scan)':
-                st.markdown(f"""
-                <div class="file-card" style="border: 1px dashed #ccc; opacity: 0.6;">
-                    <div class="fc-header" title="{row['Nama Bank']}">{row['Nama Bank']}</div>
-                    <div class="fc-sub">{row['Tahun']} • {row['Nama File'][:15]}...</div>
-                    <div style="margin-top:20px; text-align:center; font-style:italic;">
-                        ⚠️ Skipped (Scanned File)
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                row_keywords = row[keyword_cols]
-                file_top_kw = row_keywords.idxmax() if not row_keywords.empty else "N/A"
-                file_top_count = row_keywords.max() if not row_keywords.empty else 0
-                
-                card_html = styles.render_file_card(
-                    bank=row['Nama Bank'],
-                    year=row['Tahun'],
-                    filename=row['Nama File'],
-                    total_words=row['Total Kata Dokumen'],
-                    top_keyword=file_top_kw,
-                    top_count=file_top_count
-                )
-                st.markdown(card_html, unsafe_allow_html=True)
+    render_file_breakdown(prepared)
+
+    st.write("")
+    render_yearly_trends(prepared, keyword_cols)
 
     st.write("")
     st.divider()
 
     st.markdown('<div class="download-header">📥 Export Data</div>', unsafe_allow_html=True)
-    csv_data = logic.generate_csv_output(results)
-    safe_zip_name = st.session_state.zip_name.replace('.zip', '') if st.session_state.zip_name else "Analysis"
+    safe_zip_name = logic.archive_stem(st.session_state.zip_name) if st.session_state.zip_name else "Analysis"
     
     col_d1, col_d2, col_d3 = st.columns([1, 2, 1])
     with col_d2:
         st.download_button(
             label="📄 Download Full CSV Report",
-            data=csv_data,
+            data=prepared["csv"],
             file_name=f"{safe_zip_name}_Analysis.csv",
             mime="text/csv",
             use_container_width=True
         )
+        if prepared["parquet"] is not None:
+            st.download_button(
+                label="🧱 Download Parquet (Analytics)",
+                data=prepared["parquet"],
+                file_name=f"{safe_zip_name}_Analysis.parquet",
+                mime="application/octet-stream",
+                use_container_width=True
+            )
+        if not prepared["yearly"].empty:
+            st.download_button(
+                label="📈 Download YoY Pivot (per 10k kata)",
+                data=prepared["pivot_csv"],
+                file_name=f"{safe_zip_name}_YoY_Pivot.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+            st.download_button(
+                label="🗂️ Download Ringkasan Bank x Tahun",
+                data=prepared["yearly_csv"],
+                file_name=f"{safe_zip_name}_Bank_Tahun.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
 
     st.write("")
     st.markdown("### 🔎 Detailed Data Preview")
     
     # PERBAIKAN: Menambahkan 'Tahun' dan 'Total Kata Dokumen' ke dalam list display
-    display_cols = ["Nama Bank", "Tahun", "Status", "Nama File"] + keyword_cols + ["Total Kata Dokumen"]
+    display_cols = ["Nama Bank", "Tahun", "Status", "Nama File"] + keyword_cols + ["Total Kata Dokumen", "Duplikat Dari", "Mirip Dengan", "Kemiripan"]
     valid_cols = [c for c in display_cols if c in df.columns]
     
     st.dataframe(df[valid_cols], use_container_width=True)
 
+    if st.session_state.matcher_signature:
+        st.write("")
+        render_kwic_search(df, keyword_cols)
+
+    metrics_summary = prepared["metrics_summary"]
+    if metrics_summary:
+        st.write("")
+        with st.expander("⏱️ Performance Metrics"):
+            st.markdown("Ringkasan waktu per file (ms) dan ukuran input untuk seluruh batch.")
+            summary_df = pd.DataFrame.from_dict(metrics_summary, orient="index")
+            st.dataframe(summary_df, use_container_width=True)
+            
+            metric_rows = [
+                {"Nama File": r.get("Nama File"), "Status": r.get("Status"), **r["Metrik"]}
+                for r in results if r.get("Metrik")
+            ]
+            st.dataframe(pd.DataFrame(metric_rows), use_container_width=True)
+            st.download_button(
+                label="⬇️ Download Metrics (JSON)",
+                data=prepared["metrics_json"],
+                file_name=f"{safe_zip_name}_Metrics.json",
+                mime="application/json",
+                use_container_width=True
+            )
+
     st.write("")
     if st.button("📂 Start Over"):
         reset_app()
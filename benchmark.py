@@ -0,0 +1,426 @@
+"""
+Benchmark pipeline analisis dengan korpus laporan tahunan sintetis (deterministik).
+
+Contoh:
+    python benchmark.py --size small
+    python benchmark.py --size medium --output bench_results/run.json --compare bench_results/baseline.json
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import zipfile
+import argparse
+import platform
+import resource
+import tempfile
+import tracemalloc
+import subprocess
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+import logic
+
+# Ukuran korpus: (jumlah dokumen per format, halaman per dokumen, kata per halaman)
+CORPUS_SIZES: Dict[str, Tuple[int, int, int]] = {
+    "small": (3, 10, 400),
+    "medium": (10, 40, 500),
+    "large": (30, 120, 600),
+}
+
+# Anggaran waktu `import logic` / `import cli` di proses baru; dibayar setiap worker proses, run CLI, dan cold start Streamlit
+IMPORT_BUDGET_MS = 150
+# Modul yang diukur waktu import-nya (worker forkserver meng-import ulang skrip CLI sebagai __main__)
+IMPORT_MODULES = ("logic", "cli")
+# Modul berat yang hanya boleh dimuat saat file formatnya benar-benar dibaca / pivot benar-benar dihitung
+LAZY_MODULES = ("pymupdf", "fitz", "docx", "PIL", "pdf2image", "pytesseract", "numpy", "pandas", "streamlit")
+# Ukuran teks satu halaman untuk tahap hitung kata dokumen besar (TXT/DOCX/HTML = satu halaman)
+LARGE_TEXT_WORDS = 2_000_000
+
+FILLER_WORDS = (
+    "bank perusahaan laporan tahunan kinerja keuangan the company annual report revenue "
+    "growth risk management nasabah kredit dana pihak ketiga aset liabilitas ekuitas laba "
+    "operational strategy customer network branch governance sustainability direksi komisaris"
+).split()
+
+KEYWORD_PHRASES = [
+    "fintech", "financial technology", "AI", "artificial intelligence", "blockchain", "big data",
+    "machine learning", "cloud computing", "digital banking", "mobile banking", "e-payment",
+    "cybersecurity", "digital service", "teknologi finansial", "kecerdasan buatan", "mahadata",
+    "komputasi awan", "bank digital", "m-banking", "pembayaran digital", "keamanan siber", "layanan digital",
+]
+
+
+# 1. GENERATOR KORPUS
+
+def make_page_text(rng: random.Random, words: int, keyword_rate: float = 0.01) -> str:
+    tokens = []
+    for i in range(words):
+        tokens.append(rng.choice(KEYWORD_PHRASES) if rng.random() < keyword_rate else rng.choice(FILLER_WORDS))
+        if i % 12 == 11:
+            tokens.append("\n")
+    return " ".join(tokens)
+
+def make_native_pdf(pages: List[str]) -> bytes:
+    fitz = logic.get_fitz()
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(40, 40, 555, 800), text, fontsize=7)
+    return doc.tobytes()
+
+def make_image_pdf(pages: List[str]) -> bytes:
+    """PDF tanpa text layer: tiap halaman adalah gambar hasil render teks."""
+    fitz = logic.get_fitz()
+    doc = fitz.open()
+    for text in pages:
+        source = fitz.open()
+        source_page = source.new_page()
+        source_page.insert_textbox(fitz.Rect(40, 40, 555, 800), text, fontsize=9)
+        pixmap = source_page.get_pixmap(dpi=150, colorspace=fitz.csGRAY)
+        page = doc.new_page()
+        page.insert_image(page.rect, stream=pixmap.tobytes("png"))
+        source.close()
+    return doc.tobytes(garbage=3, deflate=True)
+
+def make_docx(pages: List[str]) -> bytes:
+    import docx
+    document = docx.Document()
+    for text in pages:
+        for paragraph in text.split("\n"):
+            document.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def generate_corpus(size: str, seed: int = 42, include_images: bool = True) -> Dict[str, List[Tuple[str, bytes, int]]]:
+    """
+    Returns: Dict format -> List[(nama file, bytes, jumlah halaman)]
+    Seed yang sama selalu menghasilkan korpus yang sama, sehingga hasil antar run sebanding.
+    """
+    docs_per_format, pages_per_doc, words_per_page = CORPUS_SIZES[size]
+    rng = random.Random(seed)
+    corpus: Dict[str, List[Tuple[str, bytes, int]]] = {"pdf": [], "docx": [], "txt": [], "scan": []}
+    for i in range(docs_per_format):
+        year = 2015 + i % 10
+        pages = [make_page_text(rng, words_per_page) for _ in range(pages_per_doc)]
+        corpus["pdf"].append((f"Laporan Tahunan {year} ({i}).pdf", make_native_pdf(pages), pages_per_doc))
+        corpus["docx"].append((f"Annual Report {year} ({i}).docx", make_docx(pages), 1))
+        corpus["txt"].append((f"Annual Report {year} ({i}).txt", "\n".join(pages).encode("utf-8"), 1))
+        if include_images:
+            # PDF scan lebih kecil: OCR jauh lebih lambat dari ekstraksi native
+            scan_pages = pages[:max(1, pages_per_doc // 10)]
+            corpus["scan"].append((f"Scan {year} ({i}).pdf", make_image_pdf(scan_pages), len(scan_pages)))
+    return corpus
+
+def write_corpus_zip(corpus: Dict[str, List[Tuple[str, bytes, int]]], path: str, formats: Tuple[str, ...] = ("pdf", "docx", "txt")) -> str:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for fmt in formats:
+            for name, data, _ in corpus[fmt]:
+                z.writestr(f"Bank Sintetis/{name}", data)
+    return path
+
+
+# 2. PENGUKURAN
+
+def children_peak_rss_mb() -> float:
+    """Peak RSS child process yang sudah selesai (worker pool, tesseract), dalam MB."""
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss: KB di Linux, bytes di macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def reset_peak_rss() -> bool:
+    """Reset high-water mark RSS proses ini (Linux: /proc/self/clear_refs). False jika tidak didukung."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def stage_peak_rss_mb() -> Optional[float]:
+    """Peak RSS proses ini sejak reset_peak_rss() terakhir (VmHWM), dalam MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    total_bytes: int = 0,
+    pages: int = 0,
+    repeat: int = 1,
+    trace_allocations: bool = False
+) -> Dict[str, Any]:
+    """
+    Waktu terbaik dari N run. peak_rss_mb = puncak RSS proses ini selama tahap ini saja (high-water
+    mark di-reset sebelum tahap; None jika OS tidak mendukung). child_rss_growth_mb = kenaikan
+    puncak RSS child process langsung (mis. tesseract) selama tahap ini; ru_maxrss child hanya
+    bisa naik, dan worker forkserver bukan child langsung proses ini.
+    trace_allocations=True menambah satu run di bawah tracemalloc (tidak ikut diukur waktunya)
+    untuk puncak alokasi Python tahap itu saja.
+    """
+    children_before = children_peak_rss_mb()
+    stage_rss = reset_peak_rss()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    result = {
+        "stage": name,
+        "seconds": round(best, 4),
+        "bytes": total_bytes,
+        "pages": pages,
+        "mb_per_s": round(total_bytes / 1e6 / best, 2) if best > 0 and total_bytes else None,
+        "pages_per_s": round(pages / best, 2) if best > 0 and pages else None,
+        "peak_rss_mb": stage_peak_rss_mb() if stage_rss else None,
+        "child_rss_growth_mb": round(children_peak_rss_mb() - children_before, 1),
+    }
+    if trace_allocations:
+        tracemalloc.start()
+        try:
+            func()
+            result["peak_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        finally:
+            tracemalloc.stop()
+    print(
+        f"{name:<28} {best:8.3f}s"
+        + (f"  {result['mb_per_s']:>8} MB/s" if result["mb_per_s"] else "")
+        + (f"  {result['pages_per_s']:>8} pages/s" if result["pages_per_s"] else "")
+        + (f"  rss {result['peak_rss_mb']} MB" if result["peak_rss_mb"] is not None else "")
+        + (f"  worker rss +{result['child_rss_growth_mb']} MB" if result["child_rss_growth_mb"] else "")
+        + (f"  alloc {result['peak_alloc_mb']} MB" if trace_allocations else ""),
+        file=sys.stderr
+    )
+    return result
+
+def measure_import(repeat: int = 3, module: str = "logic") -> Dict[str, Any]:
+    """Waktu import `module` di interpreter baru (terbaik dari N run) dan modul berat yang ikut termuat."""
+    stage = f"import_{module}"
+    probe = (
+        f"import sys, time; start = time.perf_counter(); import {module}; "
+        "print((time.perf_counter() - start) * 1000); "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    timings, loaded = [], []
+    for _ in range(max(1, repeat)):
+        output = subprocess.run(
+            [sys.executable, "-c", probe], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+        timings.append(float(output[0]))
+        loaded = [m for m in (output[1] if len(output) > 1 else "").split(",") if m]
+    best_ms = min(timings)
+    result = {
+        "stage": stage,
+        "seconds": round(best_ms / 1000, 4),
+        "budget_ms": IMPORT_BUDGET_MS,
+        "within_budget": best_ms <= IMPORT_BUDGET_MS and not loaded,
+        "eager_modules": loaded,
+    }
+    print(
+        f"{stage:<28} {best_ms / 1000:8.3f}s  budget {IMPORT_BUDGET_MS} ms"
+        + ("  MELEBIHI ANGGARAN" if best_ms > IMPORT_BUDGET_MS else "")
+        + (f"  modul berat dimuat: {', '.join(loaded)}" if loaded else ""),
+        file=sys.stderr
+    )
+    return result
+
+def _reference_counts(categories: Dict[str, List[str]], text: str) -> Dict[str, int]:
+    # Semantik acuan: satu findall per kategori, alternation sesuai urutan term
+    return {key: len(re.findall(r"\b(?:" + "|".join(terms) + r")\b", text, re.IGNORECASE)) for key, terms in categories.items()}
+
+def check_matcher_equivalence(seed: int, cases: int = 500) -> Dict[str, Any]:
+    """
+    KeywordMatcher.count (trie / pass gabungan) vs findall per kategori pada dictionary dan teks
+    acak dari kosakata kecil, sehingga term sering tumpang tindih (prefix, frasa berbagi kata).
+    Termasuk dictionary bawaan dan dictionary dengan term regex.
+    """
+    rng = random.Random(seed)
+    vocabulary = ["bank", "digital", "banking", "ai", "data", "big", "e", "pay", "layanan", "cloud"]
+    separators = [" ", " ", " ", "-", ", ", ". ", "\n"]
+
+    def random_text(words: int) -> str:
+        return "".join(rng.choice(vocabulary) + rng.choice(separators) for _ in range(words))
+
+    def random_term() -> str:
+        n = rng.randint(1, 3)
+        return "".join(rng.choice(vocabulary) + (rng.choice((" ", "-")) if i < n - 1 else "") for i in range(n))
+
+    start = time.perf_counter()
+    mismatches: List[Dict[str, Any]] = []
+    for case in range(cases):
+        if case < 2:
+            categories = logic.get_pattern_terms(bilingual=bool(case))
+        else:
+            categories = {}
+            for i in range(rng.randint(1, 4)):
+                terms = list(dict.fromkeys(re.escape(random_term()) for _ in range(rng.randint(1, 5))))
+                if rng.random() < 0.2:
+                    terms.append(rng.choice(vocabulary) + "(?:ing|s)?")
+                categories[f"K{i}"] = terms
+        text = random_text(200)
+        expected = _reference_counts(categories, text)
+        actual = logic.build_keyword_matcher(categories).count(text)
+        if actual != expected:
+            mismatches.append({"categories": categories, "expected": expected, "actual": actual})
+    seconds = time.perf_counter() - start
+    print(
+        f"{'matcher_equivalence':<28} {seconds:8.3f}s  {cases} kasus, {len(mismatches)} berbeda dari findall",
+        file=sys.stderr
+    )
+    return {"stage": "matcher_equivalence", "seconds": round(seconds, 4), "cases": cases,
+            "mismatches": len(mismatches), "examples": mismatches[:3]}
+
+def _consume_pages(fmt: str, docs: List[Tuple[str, bytes, int]], include_scanned: bool = False) -> List[str]:
+    texts = []
+    for name, data, _ in docs:
+        pages, _ = logic.extract_pages(name, data, include_scanned)
+        texts.append("".join(pages))
+    return texts
+
+
+# 3. SUITE
+
+def run_suite(size: str, seed: int, repeat: int, with_ocr: bool, executor_modes: List[str]) -> Dict[str, Any]:
+    stages: List[Dict[str, Any]] = [measure_import(repeat, module) for module in IMPORT_MODULES]
+    stages.append(check_matcher_equivalence(seed))
+    corpus = generate_corpus(size, seed, include_images=with_ocr)
+    workdir = tempfile.mkdtemp(prefix="wc-bench-")
+    try:
+        zip_path = write_corpus_zip(corpus, os.path.join(workdir, "Bank Sintetis 2023.zip"))
+        zip_size = os.path.getsize(zip_path)
+
+        def read_zip() -> None:
+            with zipfile.ZipFile(zip_path) as z:
+                for name in z.namelist():
+                    z.read(name)
+        uncompressed = sum(len(d) for fmt in ("pdf", "docx", "txt") for _, d, _ in corpus[fmt])
+        stages.append(measure("zip_read", read_zip, uncompressed, repeat=repeat))
+
+        texts: List[str] = []
+        for fmt in ("pdf", "docx", "txt"):
+            docs = corpus[fmt]
+            size_bytes = sum(len(d) for _, d, _ in docs)
+            pages = sum(p for _, _, p in docs)
+            stages.append(measure(f"extract_{fmt}", lambda docs=docs, fmt=fmt: _consume_pages(fmt, docs), size_bytes, pages, repeat))
+            if fmt == "txt":
+                texts = _consume_pages(fmt, docs)
+
+        # Pre-classifier scan vs native: hanya metadata halaman sampel, tanpa ekstraksi teks
+        detect_docs = corpus["pdf"] + corpus["scan"]
+        def detect_scans() -> None:
+            for _, data, _ in detect_docs:
+                with logic.get_fitz().open(stream=data, filetype="pdf") as doc:
+                    logic.classify_pdf(doc)
+        stages.append(measure("scan_detect", detect_scans, sum(len(d) for _, d, _ in detect_docs), repeat=repeat))
+
+        if with_ocr:
+            if shutil.which("tesseract") and shutil.which("pdftoppm"):
+                docs = corpus["scan"]
+                stages.append(measure(
+                    "ocr_scan_pdf", lambda: _consume_pages("scan", docs, include_scanned=True),
+                    sum(len(d) for _, d, _ in docs), sum(p for _, _, p in docs)
+                ))
+            else:
+                print("ocr_scan_pdf                 dilewati (tesseract/pdftoppm tidak ditemukan)", file=sys.stderr)
+
+        text_bytes = sum(len(t.encode("utf-8")) for t in texts)
+        stages.append(measure("count_keywords_en", lambda: [logic.get_keyword_matcher(False).count(t) for t in texts], text_bytes, repeat=repeat))
+        stages.append(measure("count_keywords_bi", lambda: [logic.get_keyword_matcher(True).count(t) for t in texts], text_bytes, repeat=repeat))
+        stages.append(measure("count_words", lambda: [logic.count_total_words(t) for t in texts], text_bytes, repeat=repeat))
+        # Dokumen satu halaman berukuran besar: hitung per potongan vs len(text.split()) (list semua token)
+        corpus_text = " ".join(texts)
+        large_text = " ".join([corpus_text] * -(-LARGE_TEXT_WORDS // max(1, len(corpus_text.split()))))
+        large_bytes = len(large_text.encode("utf-8"))
+        stages.append(measure("count_words_large", lambda: logic.count_total_words(large_text), large_bytes, repeat=repeat, trace_allocations=True))
+        stages.append(measure("count_words_large_split", lambda: len(large_text.split()), large_bytes, repeat=repeat, trace_allocations=True))
+        del corpus_text, large_text
+
+        rows = []
+        rng = random.Random(seed)
+        for i in range(20000):
+            row = {"Nama Bank": f"Bank \"{i % 50}\"", "Tahun": str(2010 + i % 14), "Nama File": f"AR {i}.pdf",
+                   "Status": "SUCCESS", "Total Kata Dokumen": rng.randint(1000, 2000000)}
+            row.update({k: rng.randint(0, 500) for k in logic.BASE_PATTERNS})
+            rows.append(row)
+        stages.append(measure("csv_20k_rows", lambda: logic.generate_csv_output(rows), repeat=repeat))
+
+        total_pages = sum(p for fmt in ("pdf", "docx", "txt") for _, _, p in corpus[fmt])
+        for mode in executor_modes:
+            stages.append(measure(
+                f"end_to_end_{mode}",
+                lambda mode=mode: logic.process_zip_file(zip_path, True, False, executor_mode=mode, use_cache=False),
+                zip_size, total_pages, repeat
+            ))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "size": size,
+        "seed": seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": logic.resolve_worker_count(),
+        "stages": stages,
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    old = {s["stage"]: s for s in baseline.get("stages", [])}
+    print(f"\n{'stage':<28} {'baseline':>10} {'current':>10} {'change':>8}", file=sys.stderr)
+    for stage in current["stages"]:
+        before = old.get(stage["stage"])
+        if not before or not before["seconds"]:
+            continue
+        change = (stage["seconds"] - before["seconds"]) / before["seconds"] * 100
+        print(f"{stage['stage']:<28} {before['seconds']:>9.3f}s {stage['seconds']:>9.3f}s {change:>+7.1f}%", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline Annual Report Analyzer")
+    parser.add_argument("--size", choices=sorted(CORPUS_SIZES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="Ambil waktu terbaik dari N kali ulang")
+    parser.add_argument("--no-ocr", action="store_true", help="Lewati tahap OCR")
+    parser.add_argument("--executors", default="serial,thread,process", help="Mode executor untuk tahap end-to-end")
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    parser.add_argument("--compare", help="Bandingkan dengan file JSON hasil run sebelumnya")
+    args = parser.parse_args(argv)
+
+    modes = [m for m in args.executors.split(",") if m]
+    report = run_suite(args.size, args.seed, args.repeat, not args.no_ocr, modes)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Hasil disimpan ke {args.output}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    # Exit code 1 jika salah satu import melebihi anggaran atau hitungan matcher berbeda dari findall,
+    # sehingga bisa dipakai sebagai gate di CI
+    import_stages = [s for s in report["stages"] if s["stage"].startswith("import_")]
+    matcher_stage = next(s for s in report["stages"] if s["stage"] == "matcher_equivalence")
+    return 0 if all(s["within_budget"] for s in import_stages) and not matcher_stage["mismatches"] else 1
+
+
+if __name__ == "__main__":
+    logic.configure_logging()
+    logic.logger.setLevel("WARNING")
+    sys.exit(main())
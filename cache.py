@@ -0,0 +1,191 @@
+import os
+import json
+import gzip
+import hashlib
+import logging
+import tempfile
+import functools
+from typing import Dict, Any, Optional, Iterator
+
+logger = logging.getLogger(__name__)
+
+# KONFIGURASI CACHE
+# WORDCOUNTER_CACHE=0 mematikan cache sepenuhnya (semua file diekstraksi ulang)
+CACHE_ENABLED = os.environ.get("WORDCOUNTER_CACHE", "1") != "0"
+CACHE_DIR = os.environ.get(
+    "WORDCOUNTER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "wordcounter")
+)
+CACHE_MAX_BYTES = int(os.environ.get("WORDCOUNTER_CACHE_MAX_MB", "2048")) * 1024 * 1024
+
+
+def _finish_key(digest: "hashlib._Hash", parts: tuple) -> str:
+    for part in parts:
+        digest.update(b"\0" + str(part).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def make_key(file_bytes: bytes, *parts: Any) -> str:
+    """
+    Key berbasis konten: hash bytes file + parameter yang mempengaruhi hasil ekstraksi
+    (versi extractor, opsi OCR). Nama file sengaja tidak ikut, sehingga file yang sama
+    di ZIP berbeda tetap kena cache.
+    """
+    return _finish_key(hashlib.sha256(file_bytes), parts)
+
+
+def make_file_key(path: str, *parts: Any) -> str:
+    """Sama dengan make_key, tetapi file di-hash per blok dari disk (tanpa dibaca utuh ke memori)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(functools.partial(f.read, 1024 * 1024), b""):
+            digest.update(chunk)
+    return _finish_key(digest, parts)
+
+
+class ResultCache:
+    """
+    Cache on-disk untuk teks hasil ekstraksi dan hitungan keyword per pattern set.
+
+    Tiap entry terdiri dari dua file:
+    - <key>.json   : metadata (status skip, total kata, counts per signature matcher)
+    - <key>.txt.gz : teks per halaman hasil ekstraksi/OCR, dipakai untuk menghitung ulang pattern set baru
+
+    Eviction LRU berdasarkan ukuran total; mtime di-update setiap kali entry dibaca.
+    Penulisan atomik (tmp + os.replace) sehingga aman dipakai banyak worker proses.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _touch(self, *paths: str) -> None:
+        for path in paths:
+            try: os.utime(path)
+            except OSError: pass
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        meta_path = self._path(key, ".json")
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._touch(meta_path, self._path(key, ".txt.gz"))
+        return meta
+
+    def iter_pages(self, key: str) -> Optional[Iterator[str]]:
+        path = self._path(key, ".txt.gz")
+        if not os.path.exists(path):
+            return None
+        return self._read_pages(path)
+
+    def _read_pages(self, path: str) -> Iterator[str]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+        except (OSError, EOFError, ValueError) as e:
+            logger.warning(f"Entry cache rusak {os.path.basename(path)}: {e}")
+
+    def open_page_writer(self, key: str) -> "PageWriter":
+        return PageWriter(self, key)
+
+    def put(self, key: str, meta: Dict[str, Any]) -> None:
+        try:
+            self._write_atomic(self._path(key, ".json"), json.dumps(meta).encode("utf-8"))
+            self.evict()
+        except OSError as e:
+            logger.warning(f"Gagal menulis cache {key[:12]}: {e}")
+
+    def evict(self) -> None:
+        """Hapus entry yang paling lama tidak dipakai sampai total ukuran <= max_bytes."""
+        entries: Dict[str, list] = {}
+        total = 0
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith(".tmp") or not item.is_file():
+                    continue
+                stat = item.stat()
+                key = item.name.split(".", 1)[0]
+                entry = entries.setdefault(key, [0.0, 0])
+                entry[0] = max(entry[0], stat.st_mtime)
+                entry[1] += stat.st_size
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for key, (_, size) in sorted(entries.items(), key=lambda kv: kv[1][0]):
+            for suffix in (".json", ".txt.gz"):
+                try: os.remove(self._path(key, suffix))
+                except OSError: pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+class PageWriter:
+    """
+    Menulis teks halaman demi halaman (satu JSON string per baris, gzip) ke file sementara.
+    Entry baru terlihat oleh pembaca setelah commit(); tanpa commit file sementara dibuang.
+    """
+
+    def __init__(self, result_cache: ResultCache, key: str):
+        self._cache = result_cache
+        self._key = key
+        fd, self._tmp_path = tempfile.mkstemp(dir=result_cache.directory, suffix=".tmp")
+        self._raw = os.fdopen(fd, "wb")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=3)
+        self._closed = False
+
+    def write(self, page_text: str) -> None:
+        self._gz.write((json.dumps(page_text) + "\n").encode("utf-8"))
+
+    def _close(self) -> None:
+        if not self._closed:
+            self._gz.close()
+            self._raw.close()
+            self._closed = True
+
+    def commit(self, meta: Dict[str, Any]) -> None:
+        try:
+            self._close()
+            os.replace(self._tmp_path, self._cache._path(self._key, ".txt.gz"))
+        except OSError as e:
+            logger.warning(f"Gagal menulis cache {self._key[:12]}: {e}")
+            return
+        self._cache.put(self._key, meta)
+
+    def __enter__(self) -> "PageWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_result_cache() -> Optional[ResultCache]:
+    """Satu instance per proses. None jika cache dimatikan atau direktori tidak bisa dibuat."""
+    if not CACHE_ENABLED:
+        return None
+    try:
+        return ResultCache()
+    except OSError as e:
+        logger.warning(f"Cache dinonaktifkan, direktori {CACHE_DIR} tidak bisa dipakai: {e}")
+        return None
@@ -0,0 +1,164 @@
+"""
+Entry point command-line untuk analisis batch tanpa Streamlit.
+
+Contoh:
+    python cli.py laporan/ BankA.zip BankB.zip -o hasil.csv --bilingual --include-scanned
+    python cli.py laporan/ -o hasil.csv --pivot yoy.csv --pivot-value density
+"""
+import os
+import sys
+import argparse
+import concurrent.futures
+from typing import List, Dict, Any, Optional
+
+import logic
+import jobs
+import aggregate
+
+
+def collect_archives(paths: List[str]) -> List[str]:
+    """Kumpulkan arsip (.zip, .tar, .tar.gz, .tgz) dari argumen; direktori ditelusuri secara rekursif."""
+    archives = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                archives.extend(os.path.join(root, f) for f in sorted(files) if logic.archive_kind(f))
+        elif os.path.isfile(path):
+            archives.append(path)
+        else:
+            raise FileNotFoundError(f"Path tidak ditemukan: {path}")
+    return archives
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Annual Report Analyzer (batch / headless)")
+    parser.add_argument("paths", nargs="+", help="Arsip ZIP/tar.gz (boleh bertingkat) atau direktori berisi arsip")
+    parser.add_argument("-o", "--output", default="-", help="File output (default: stdout, hanya untuk CSV)")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv", help="Format output (parquet butuh pyarrow)")
+    parser.add_argument("--bilingual", action="store_true", help="Aktifkan pencarian Indonesia + English")
+    parser.add_argument("--include-scanned", action="store_true", help="Proses PDF scan dengan OCR")
+    parser.add_argument("--dictionary", help="Dictionary keyword custom (YAML/JSON), menggantikan keyword bawaan")
+    parser.add_argument("--no-cache", action="store_true", help="Abaikan cache hasil, ekstraksi ulang semua file (dengan --resume: job dimulai ulang dari awal)")
+    parser.add_argument("--kwic", action="store_true", help="Simpan konteks setiap keyword ke indeks KWIC (cari dengan python kwic.py)")
+    parser.add_argument("--resume", action="store_true", help="Checkpoint hasil per file ke job store; perintah yang sama melanjutkan batch yang terputus")
+    parser.add_argument("--no-dedupe", action="store_true", help="Analisis setiap salinan file identik sendiri-sendiri (default: sekali, hasil disalin ke tiap path)")
+    parser.add_argument("--near-duplicates", action="store_true", help="Tandai dokumen yang teksnya hampir sama dengan dokumen lain di batch (kolom Mirip Dengan dan Kemiripan di CSV/Parquet)")
+    parser.add_argument("--executor", choices=logic.EXECUTOR_MODES, default=logic.DEFAULT_EXECUTOR_MODE)
+    parser.add_argument("--workers", type=int, default=logic.DEFAULT_MAX_WORKERS, help="Jumlah worker (default: jumlah CPU)")
+    parser.add_argument("--parallel-archives", type=int, default=2, help="Jumlah ZIP yang di-dispatch bersamaan ke pool")
+    parser.add_argument("--pivot", help="Tulis pivot bank x kategori x tahun (CSV) ke file ini")
+    parser.add_argument("--pivot-value", choices=aggregate.PIVOT_VALUES, default="density", help="Nilai pivot: density (hit per 10k kata), count, atau yoy (selisih density dengan tahun sebelumnya)")
+    parser.add_argument("--summary", help="Tulis ringkasan per bank x tahun (file, kata, hit, density) sebagai CSV")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Jangan tampilkan progres per file")
+    return parser
+
+
+def run(
+    args: argparse.Namespace,
+    matcher: logic.KeywordMatcher,
+    summary: Optional[aggregate.YearlyAggregate] = None
+) -> List[Dict[str, Any]]:
+    archives = collect_archives(args.paths)
+    if not archives:
+        print("Tidak ada arsip yang ditemukan.", file=sys.stderr)
+        return []
+
+    def progress(current: int, total: int, filename: str, archive: str) -> None:
+        if not args.quiet:
+            print(f"[{os.path.basename(archive)}] ({current}/{total}) {filename}", file=sys.stderr)
+
+    # Ringkasan bank x tahun di-update begitu tiap file selesai (dari thread dispatcher tiap arsip)
+    on_result = (lambda member, row: summary.add(row)) if summary is not None else None
+
+    # Satu pool worker dipakai bersama oleh semua ZIP, sehingga proses worker
+    # tidak di-spawn ulang per arsip dan ekor antrean satu ZIP diisi ZIP berikutnya.
+    results: List[Dict[str, Any]] = []
+    with logic.create_executor(args.executor, args.workers) as pool:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.parallel_archives)) as dispatcher:
+            if args.resume:
+                options = jobs.job_options(matcher, args.include_scanned, args.kwic)
+                futures = [
+                    dispatcher.submit(
+                        jobs.run_job,
+                        jobs.create_job(archive, options),
+                        progress_callback=lambda c, t, f, a=archive: progress(c, t, f, a),
+                        use_cache=not args.no_cache,
+                        max_workers=args.workers,
+                        executor=pool,
+                        result_callback=on_result,
+                        dedupe=not args.no_dedupe,
+                        detect_near_duplicates=args.near_duplicates
+                    )
+                    for archive in archives
+                ]
+            else:
+                futures = [
+                    dispatcher.submit(
+                        logic.process_zip_file,
+                        archive,
+                        args.bilingual,
+                        args.include_scanned,
+                        progress_callback=lambda c, t, f, a=archive: progress(c, t, f, a),
+                        max_workers=args.workers,
+                        use_cache=not args.no_cache,
+                        executor=pool,
+                        matcher=matcher,
+                        index_context=args.kwic,
+                        result_callback=on_result,
+                        dedupe=not args.no_dedupe,
+                        detect_near_duplicates=args.near_duplicates
+                    )
+                    for archive in archives
+                ]
+            for future in futures:
+                results.extend(future.result())
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logic.configure_logging()
+    try:
+        if args.dictionary:
+            matcher = logic.load_keyword_dictionary(args.dictionary)
+        else:
+            matcher = logic.get_keyword_matcher(args.bilingual)
+        summary = aggregate.YearlyAggregate(matcher.categories) if args.pivot or args.summary else None
+        results = run(args, matcher, summary)
+    except (FileNotFoundError, ValueError, ImportError) as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    keyword_headers = matcher.categories
+    duplicate_columns = logic.has_duplicate_columns(results)
+
+    if args.format == "parquet":
+        if args.output == "-":
+            print("Output Parquet harus ke file (-o hasil.parquet).", file=sys.stderr)
+            return 2
+        try:
+            written = logic.write_parquet_output(results, args.output, keyword_headers, duplicate_columns)
+        except ImportError as e:
+            print(str(e), file=sys.stderr)
+            return 2
+    elif args.output == "-":
+        written = logic.write_csv_output(results, sys.stdout, keyword_headers, duplicate_columns)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            written = logic.write_csv_output(results, f, keyword_headers, duplicate_columns)
+    if args.output != "-":
+        print(f"{written} baris ditulis ke {args.output}", file=sys.stderr)
+    if summary is not None:
+        table = summary.table()
+        if args.pivot:
+            with open(args.pivot, "w", encoding="utf-8", newline="") as f:
+                pivot_rows = aggregate.write_pivot_csv(table, f, args.pivot_value)
+            print(f"Pivot {args.pivot_value}: {pivot_rows} baris ditulis ke {args.pivot}", file=sys.stderr)
+        if args.summary:
+            with open(args.summary, "w", encoding="utf-8", newline="") as f:
+                summary_rows = aggregate.write_table_csv(table, f)
+            print(f"Ringkasan bank x tahun: {summary_rows} baris ditulis ke {args.summary}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
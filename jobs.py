@@ -0,0 +1,580 @@
+"""
+Job batch yang di-checkpoint ke SQLite agar analisis panjang bisa dilanjutkan.
+
+Setiap file yang selesai langsung ditulis ke database. Batch yang terputus (rerun Streamlit,
+browser tertutup, container restart) dilanjutkan tanpa memproses ulang file yang sudah
+selesai, dan progresnya bisa dilihat dari sesi lain lewat job_id.
+"""
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import zipfile
+import tarfile
+import threading
+import functools
+import collections
+import concurrent.futures
+from typing import List, Dict, Any, Optional, Callable, Set, Tuple, Deque, Iterator
+
+import cache
+import logic
+import aggregate
+
+logger = logging.getLogger(__name__)
+
+# KONFIGURASI JOB
+# Database job + salinan ZIP upload (dihapus setelah job selesai)
+JOBS_DIR = os.environ.get("WORDCOUNTER_JOBS_DIR", os.path.join(cache.CACHE_DIR, "jobs"))
+# pending     : terdaftar, belum pernah dijalankan
+# running     : sedang diproses
+# interrupted : berhenti di tengah jalan (rerun/disconnect), bisa dilanjutkan
+# failed      : gagal fatal (mis. arsip hilang/rusak), bisa dicoba lagi
+# done        : semua file selesai, hasil lengkap di database
+JOB_STATUSES = ("pending", "running", "interrupted", "failed", "done")
+# Status baris yang tidak dihitung selesai: tetap tersimpan, tapi file dicoba lagi saat job dijalankan ulang
+# (mis. worker mati, error sementara, atau halaman OCR yang gagal), bukan di-skip selamanya sebagai checkpoint
+RETRY_STATUSES = ("ERROR", "PARTIAL (Halaman Gagal)")
+# Maksimal job yang berjalan bersamaan (lintas sesi Streamlit); job lain menunggu di antrean FIFO
+MAX_CONCURRENT_JOBS = int(os.environ.get("WORDCOUNTER_MAX_JOBS", "2"))
+# Berapa kali satu task dikirim ulang setelah pool worker rusak (worker mati karena OOM / crash).
+# Kiriman ulang dijalankan sendirian di pool, jadi task penyebabnya gagal sendiri tanpa menyeret task lain
+POOL_TASK_RETRIES = int(os.environ.get("WORDCOUNTER_POOL_TASK_RETRIES", "1"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id       TEXT PRIMARY KEY,
+    zip_name     TEXT NOT NULL,
+    archive_path TEXT NOT NULL,
+    owns_archive INTEGER NOT NULL,
+    options      TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    total        INTEGER NOT NULL,
+    error        TEXT,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    job_id TEXT NOT NULL,
+    member TEXT NOT NULL,
+    row    TEXT NOT NULL,
+    PRIMARY KEY (job_id, member)
+);
+"""
+
+
+class JobStore:
+    """
+    Penyimpanan job dan hasil per file. Satu koneksi per instance, dipakai bersama
+    banyak thread (sesi Streamlit, dispatcher CLI) dengan lock; mode WAL agar proses lain
+    tetap bisa membaca progres selama job berjalan.
+    """
+
+    def __init__(self, directory: str = JOBS_DIR):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "jobs.db"), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def _job_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        job["owns_archive"] = bool(job["owns_archive"])
+        return job
+
+    def create_job(self, job_id: str, zip_name: str, archive_path: str, owns_archive: bool, options: Dict[str, Any], total: int) -> bool:
+        """Daftarkan job baru. False jika job_id sudah ada (arsip + opsi sama -> job lama dilanjutkan)."""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs VALUES (?, ?, ?, ?, ?, 'pending', ?, NULL, ?, ?)",
+                (job_id, zip_name, archive_path, int(owns_archive), json.dumps(options), total, now, now)
+            )
+        return cursor.rowcount == 1
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT j.*, (SELECT COUNT(*) FROM results r WHERE r.job_id = j.job_id) AS done "
+                "FROM jobs j WHERE j.job_id = ?", (job_id,)
+            ).fetchone()
+        return self._job_dict(row) if row else None
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT j.*, (SELECT COUNT(*) FROM results r WHERE r.job_id = j.job_id) AS done "
+                "FROM jobs j ORDER BY j.updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._job_dict(row) for row in rows]
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, error, time.time(), job_id)
+            )
+
+    def save_result(self, job_id: str, member: str, row: Dict[str, Any]) -> None:
+        # Commit per file: checkpoint yang sudah ditulis tidak hilang walau proses mati
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (job_id, member, json.dumps(row)))
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def reset_job(self, job_id: str) -> None:
+        """Hapus semua hasil tersimpan job dan kembalikan statusnya ke pending (proses ulang dari awal)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+            self._conn.execute(
+                "UPDATE jobs SET status = 'pending', error = NULL, updated_at = ? WHERE job_id = ?",
+                (time.time(), job_id)
+            )
+
+    def completed_members(self, job_id: str) -> Set[str]:
+        """Member yang sudah selesai; baris berstatus RETRY_STATUSES tidak dihitung."""
+        return {member for member, row in self.load_result_items(job_id) if row.get("Status") not in RETRY_STATUSES}
+
+    def retry_count(self, job_id: str) -> int:
+        """Jumlah hasil tersimpan yang akan dicoba lagi (RETRY_STATUSES)."""
+        return sum(1 for _, row in self.load_result_items(job_id) if row.get("Status") in RETRY_STATUSES)
+
+    def load_result_items(self, job_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        # Urutan rowid = urutan file selesai, sama dengan urutan hasil process_zip_file
+        with self._lock:
+            rows = self._conn.execute("SELECT member, row FROM results WHERE job_id = ? ORDER BY rowid", (job_id,)).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def load_results(self, job_id: str) -> List[Dict[str, Any]]:
+        return [row for _, row in self.load_result_items(job_id)]
+
+    def delete_job(self, job_id: str) -> None:
+        job = self.get_job(job_id)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        if job:
+            _release_archive(job)
+
+
+@functools.lru_cache(maxsize=None)
+def get_job_store() -> JobStore:
+    """Satu instance per proses, dipakai bersama semua sesi Streamlit."""
+    return JobStore()
+
+
+def job_options(matcher: logic.KeywordMatcher, include_scanned: bool = False, index_context: bool = False) -> Dict[str, Any]:
+    """Opsi yang mempengaruhi hasil; disimpan bersama job agar run lanjutan memakai opsi yang sama."""
+    return {"include_scanned": include_scanned, "matcher": matcher.definition(), "index_context": index_context}
+
+
+def job_matcher(job: Dict[str, Any]) -> logic.KeywordMatcher:
+    return logic.build_keyword_matcher(**job["options"]["matcher"])
+
+
+def _archive_name(archive: Any) -> str:
+    if isinstance(archive, (str, os.PathLike)):
+        return os.path.basename(os.fspath(archive))
+    return getattr(archive, "name", "archive.zip")
+
+
+def _release_archive(job: Dict[str, Any]) -> None:
+    # Salinan upload tidak dibutuhkan lagi setelah semua hasil tersimpan
+    if job["owns_archive"]:
+        shutil.rmtree(os.path.dirname(job["archive_path"]), ignore_errors=True)
+
+
+def _read_chunks(archive: Any) -> Iterator[bytes]:
+    if isinstance(archive, (str, os.PathLike)):
+        with open(archive, "rb") as f:
+            yield from iter(functools.partial(f.read, 1024 * 1024), b"")
+    else:
+        archive.seek(0)
+        yield from iter(functools.partial(archive.read, 1024 * 1024), b"")
+        archive.seek(0)
+
+
+def _stage_archives(archives: List[Any], digest: Any, directory: str) -> str:
+    """
+    Salin beberapa arsip ke satu direktori sementara (satu job); nama + isi ikut di-hash.
+    Tiap arsip di subdirektori sendiri, sehingga upload bernama sama dari folder berbeda tetap
+    terpisah tanpa mengganti nama file (Nama Bank diambil dari nama arsip).
+    """
+    staging = tempfile.mkdtemp(dir=directory, suffix=".tmp")
+    for i, archive in enumerate(archives):
+        name = _archive_name(archive)
+        digest.update(name.encode("utf-8") + b"\0")
+        target_dir = os.path.join(staging, str(i))
+        os.makedirs(target_dir)
+        target = os.path.join(target_dir, name)
+        with open(target, "wb") as out:
+            for chunk in _read_chunks(archive):
+                digest.update(chunk)
+                out.write(chunk)
+    return staging
+
+
+def create_job(archive: Any, options: Dict[str, Any], store: Optional[JobStore] = None, fresh: bool = False) -> str:
+    """
+    Daftarkan arsip sebagai job. `archive` berupa path (dipakai langsung), file-like upload
+    (disalin ke JOBS_DIR agar bisa dilanjutkan setelah restart), atau list beberapa arsip
+    (path/upload, disalin ke satu direktori job). Arsip boleh ZIP atau tar/tar.gz dan boleh
+    bertingkat. job_id = hash isi arsip + opsi, sehingga meng-upload ulang arsip yang sama
+    dengan opsi sama melanjutkan job yang terputus. fresh=True (proses ulang tanpa cache):
+    upload disimpan lagi walaupun job lama sudah selesai dan arsipnya sudah dilepas.
+    Returns: job_id
+    """
+    store = store or get_job_store()
+    if isinstance(archive, (list, tuple)):
+        if not archive:
+            raise ValueError("Tidak ada arsip untuk job")
+        archives = list(archive)
+        archive = archives[0] if len(archives) == 1 else archives
+    digest = hashlib.sha256()
+    owns_archive = not isinstance(archive, (str, os.PathLike))
+    if isinstance(archive, list):
+        names = [_archive_name(a) for a in archive]
+        zip_name = f"{names[0]} (+{len(names) - 1} arsip)"
+        archive_path = _stage_archives(archive, digest, store.directory)
+    elif owns_archive:
+        zip_name = _archive_name(archive)
+        with tempfile.NamedTemporaryFile(dir=store.directory, suffix=".tmp", delete=False) as tmp:
+            for chunk in _read_chunks(archive):
+                digest.update(chunk)
+                tmp.write(chunk)
+        archive_path = tmp.name
+    else:
+        zip_name = _archive_name(archive)
+        archive_path = os.path.abspath(os.fspath(archive))
+        for chunk in _read_chunks(archive_path):
+            digest.update(chunk)
+    digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+    job_id = digest.hexdigest()[:20]
+
+    def discard_staged() -> None:
+        if owns_archive and os.path.isdir(archive_path):
+            shutil.rmtree(archive_path)
+        elif owns_archive:
+            os.remove(archive_path)
+
+    try:
+        # Upload tersimpan sebagai *.tmp: jenis arsip diambil dari nama aslinya
+        total = len(logic.list_archive_documents(archive_path, zip_name if not isinstance(archive, list) else None))
+    except (zipfile.BadZipFile, tarfile.TarError):
+        discard_staged()
+        raise
+
+    existing = store.get_job(job_id)
+    if owns_archive:
+        # Job selesai yang masih punya file untuk dicoba lagi butuh arsipnya kembali
+        retry = fresh or (existing is not None and store.retry_count(job_id) > 0)
+        if existing and (os.path.exists(existing["archive_path"]) or (existing["status"] == "done" and not retry)):
+            discard_staged()
+        else:
+            # Banyak arsip: direktori <job_id>/archives, sehingga _release_archive tetap menghapus <job_id>/
+            final_name = "archives" if isinstance(archive, list) else zip_name
+            final_path = existing["archive_path"] if existing else os.path.join(store.directory, job_id, final_name)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(archive_path, final_path)
+            archive_path = final_path
+
+    if existing is None:
+        store.create_job(job_id, zip_name, archive_path, owns_archive, options, total)
+        logger.info(f"[job {job_id}] Job baru: {zip_name} ({total} file)")
+    else:
+        logger.info(f"[job {job_id}] Job sudah ada ({existing['status']}, {existing['done']}/{existing['total']} file)")
+    return job_id
+
+
+def run_job(
+    job_id: str,
+    progress_callback: Optional[Callable[[int, int, str], None]] = None,
+    store: Optional[JobStore] = None,
+    use_cache: bool = True,
+    executor_mode: str = logic.DEFAULT_EXECUTOR_MODE,
+    max_workers: Optional[int] = logic.DEFAULT_MAX_WORKERS,
+    executor: Optional[concurrent.futures.Executor] = None,
+    result_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    dedupe: bool = logic.DEDUPE_DOCUMENTS,
+    detect_near_duplicates: bool = logic.NEAR_DUPLICATE_DETECTION
+) -> List[Dict[str, Any]]:
+    """
+    Jalankan (atau lanjutkan) job: file yang sudah punya hasil di database dilewati, setiap
+    file yang selesai langsung di-checkpoint, lalu diteruskan ke result_callback(member, row).
+    use_cache=False memaksa proses ulang: hasil tersimpan job (termasuk job selesai) dihapus dulu.
+    result_callback menerima setiap baris job tepat sekali: hasil run sebelumnya lebih dulu.
+    Returns: semua baris hasil job (lama + baru).
+    """
+    store = store or get_job_store()
+    job = store.get_job(job_id)
+    if job is None:
+        raise ValueError(f"Job tidak ditemukan: {job_id}")
+    if not use_cache and (job["done"] or job["status"] != "pending"):
+        logger.info(f"[job {job_id}] Proses ulang tanpa cache: {job['done']} hasil tersimpan dihapus.")
+        store.reset_job(job_id)
+        job = store.get_job(job_id)
+    items = store.load_result_items(job_id)
+    retry = sum(1 for _, row in items if row.get("Status") in RETRY_STATUSES)
+    if result_callback:
+        # Baris yang akan dicoba lagi diteruskan setelah hasil barunya ada
+        for member, row in items:
+            if row.get("Status") not in RETRY_STATUSES:
+                result_callback(member, row)
+    if job["status"] == "done" and not retry:
+        return store.load_results(job_id)
+    if not os.path.exists(job["archive_path"]):
+        store.set_status(job_id, "failed", "Arsip tidak ditemukan")
+        raise FileNotFoundError(f"Arsip job {job_id} tidak ditemukan: {job['archive_path']}")
+
+    finished = store.completed_members(job_id)
+    if finished:
+        logger.info(f"[job {job_id}] Melanjutkan job: {len(finished)}/{job['total']} file sudah selesai.")
+    if retry:
+        logger.info(f"[job {job_id}] {retry} file gagal sebelumnya dicoba lagi.")
+    store.set_status(job_id, "running")
+
+    def on_result(member: str, row: Dict[str, Any]) -> None:
+        store.save_result(job_id, member, row)
+        if result_callback:
+            result_callback(member, row)
+
+    try:
+        logic.process_zip_file(
+            job["archive_path"],
+            include_scanned=job["options"]["include_scanned"],
+            progress_callback=progress_callback,
+            executor_mode=executor_mode,
+            max_workers=max_workers,
+            use_cache=use_cache,
+            executor=executor,
+            matcher=job_matcher(job),
+            skip_members=finished,
+            result_callback=on_result,
+            index_context=job["options"].get("index_context", False),
+            context_batch=job_id,
+            dedupe=dedupe,
+            detect_near_duplicates=detect_near_duplicates
+        )
+    except Exception as e:
+        store.set_status(job_id, "failed", str(e))
+        raise
+    except BaseException:
+        # Rerun/stop Streamlit atau Ctrl+C: hasil yang sudah di-checkpoint tetap aman
+        store.set_status(job_id, "interrupted")
+        raise
+
+    store.set_status(job_id, "done")
+    _release_archive(job)
+    return store.load_results(job_id)
+
+
+class _JobLane(concurrent.futures.Executor):
+    """Executor milik satu job; task-nya diteruskan ke pool bersama oleh JobScheduler secara bergiliran."""
+
+    def __init__(self, scheduler: "JobScheduler", job_id: str):
+        self._scheduler = scheduler
+        self._job_id = job_id
+        self.executor_mode = scheduler.executor_mode
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        return self._scheduler._enqueue(self._job_id, fn, args, kwargs)
+
+
+class JobScheduler:
+    """
+    Antrean job di background, dipakai bersama semua sesi Streamlit dalam satu proses.
+
+    - Maksimal `max_jobs` job berjalan bersamaan; sisanya menunggu (FIFO).
+    - Semua job berbagi satu pool worker. Task (satu file) dari job yang aktif diteruskan
+      ke pool secara round-robin, dan hanya sebanyak jumlah worker yang boleh ada di pool,
+      sehingga file dari upload kecil langsung mendapat worker berikutnya walaupun ada
+      job OCR besar yang sedang berjalan.
+    - Jika satu worker mati, pool yang rusak dibuang dan dibuat ulang; task yang ikut
+      gagal dikirim ulang satu per satu, masing-masing sendirian di pool (maks.
+      POOL_TASK_RETRIES kali per task), sehingga hanya file penyebabnya yang gagal.
+    """
+
+    def __init__(
+        self,
+        max_jobs: int = MAX_CONCURRENT_JOBS,
+        executor_mode: str = logic.DEFAULT_EXECUTOR_MODE,
+        max_workers: Optional[int] = logic.DEFAULT_MAX_WORKERS,
+        store: Optional[JobStore] = None
+    ):
+        self.max_jobs = max(1, max_jobs)
+        self.executor_mode = executor_mode
+        self._max_workers = max_workers
+        self._slots = 1 if executor_mode == "serial" else logic.resolve_worker_count(max_workers)
+        self._store = store
+        self._pool: Optional[concurrent.futures.Executor] = None
+        self._lock = threading.RLock()
+        self._waiting: Deque[Tuple[str, bool]] = collections.deque()
+        self._active: Dict[str, threading.Thread] = {}
+        self._progress: Dict[str, Tuple[int, int, str]] = {}
+        # Ringkasan bank x tahun job yang berjalan, di-update per file selesai
+        self._aggregates: Dict[str, aggregate.YearlyAggregate] = {}
+        # Task per job yang belum diteruskan ke pool; urutan dict = giliran round-robin
+        self._lanes: "collections.OrderedDict[str, Deque[Tuple]]" = collections.OrderedDict()
+        self._in_pool = 0
+        # Task yang gagal karena pool rusak, menunggu dikirim ulang sendirian; _isolated = sedang berjalan
+        self._retry: Deque[Tuple[str, Tuple]] = collections.deque()
+        self._isolated = False
+
+    @property
+    def store(self) -> JobStore:
+        return self._store or get_job_store()
+
+    def submit(self, job_id: str, use_cache: bool = True) -> None:
+        """Masukkan job ke antrean. Tidak melakukan apa-apa jika job sudah berjalan/menunggu."""
+        with self._lock:
+            if job_id in self._active or any(queued == job_id for queued, _ in self._waiting):
+                return
+            if not use_cache:
+                # Reset sebelum masuk antrean: halaman UI langsung melihat job sebagai pending, bukan hasil lama
+                self.store.reset_job(job_id)
+            self._waiting.append((job_id, use_cache))
+            logger.info(f"[job {job_id}] Masuk antrean (aktif: {len(self._active)}/{self.max_jobs}, menunggu: {len(self._waiting)})")
+            self._start_next()
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """
+        Status job di scheduler ini: state 'running' (+ progress current/total/file dan
+        aggregate, YearlyAggregate hasil sejauh ini), 'queued' (+ posisi antrean), atau None
+        jika tidak sedang dijadwalkan di proses ini.
+        """
+        with self._lock:
+            if job_id in self._active:
+                return {"state": "running", "progress": self._progress.get(job_id), "aggregate": self._aggregates.get(job_id)}
+            for position, (queued, _) in enumerate(self._waiting, start=1):
+                if queued == job_id:
+                    return {"state": "queued", "position": position}
+        return {"state": None}
+
+    def _start_next(self) -> None:
+        while len(self._active) < self.max_jobs and self._waiting:
+            job_id, use_cache = self._waiting.popleft()
+            thread = threading.Thread(target=self._run, args=(job_id, use_cache), name=f"job-{job_id[:8]}", daemon=True)
+            self._active[job_id] = thread
+            thread.start()
+
+    def _run(self, job_id: str, use_cache: bool) -> None:
+        def record_progress(current: int, total: int, filename: str) -> None:
+            self._progress[job_id] = (current, total, filename)
+
+        def record_result(member: str, row: Dict[str, Any]) -> None:
+            summary = self._aggregates.get(job_id)
+            if summary is not None:
+                summary.add(row)
+
+        try:
+            job = self.store.get_job(job_id)
+            if job is not None:
+                self._aggregates[job_id] = aggregate.YearlyAggregate(job_matcher(job).categories)
+            run_job(job_id, record_progress, store=self.store, use_cache=use_cache, executor=_JobLane(self, job_id), result_callback=record_result)
+        except Exception as e:
+            logger.error(f"[job {job_id}] Job gagal: {e}")
+        finally:
+            with self._lock:
+                self._active.pop(job_id, None)
+                self._progress.pop(job_id, None)
+                self._aggregates.pop(job_id, None)
+                self._lanes.pop(job_id, None)
+                self._start_next()
+
+    def _get_pool(self) -> concurrent.futures.Executor:
+        # Pool dibuat sekali dan dipakai ulang; worker proses tidak di-spawn ulang per job
+        if self._pool is None:
+            self._pool = logic.create_executor(self.executor_mode, self._max_workers)
+        return self._pool
+
+    def _discard_pool(self, pool: concurrent.futures.Executor) -> None:
+        # Pool rusak (BrokenProcessPool) menolak semua submit berikutnya: _get_pool membuat yang baru
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        logger.warning("Pool worker rusak (worker mati), membuat pool baru.")
+        pool.shutdown(wait=False)
+
+    def _requeue(self, job_id: str, task: Tuple) -> bool:
+        """Antrekan task untuk dikirim ulang sendirian. False jika jatah kirim ulang sudah habis."""
+        outer, fn, args, kwargs, attempts = task
+        if attempts >= POOL_TASK_RETRIES:
+            return False
+        with self._lock:
+            self._retry.append((job_id, (outer, fn, args, kwargs, attempts + 1)))
+        return True
+
+    def _enqueue(self, job_id: str, fn: Callable, args: Tuple, kwargs: Dict[str, Any]) -> concurrent.futures.Future:
+        outer: concurrent.futures.Future = concurrent.futures.Future()
+        with self._lock:
+            self._lanes.setdefault(job_id, collections.deque()).append((outer, fn, args, kwargs, 0))
+            self._dispatch()
+        return outer
+
+    def _dispatch(self) -> None:
+        with self._lock:
+            while self._in_pool < self._slots and not self._isolated:
+                if self._retry:
+                    # Kiriman ulang menunggu pool kosong lalu berjalan sendirian
+                    if self._in_pool:
+                        return
+                    job_id, task = self._retry.popleft()
+                    self._isolated = True
+                else:
+                    job_id = next((lane_id for lane_id, lane in self._lanes.items() if lane), None)
+                    if job_id is None:
+                        return
+                    self._lanes.move_to_end(job_id)
+                    task = self._lanes[job_id].popleft()
+                outer, fn, args, kwargs, attempts = task
+                # Task kiriman ulang sudah berstatus running
+                if not attempts and not outer.set_running_or_notify_cancel():
+                    continue
+                self._in_pool += 1
+                pool = self._get_pool()
+                try:
+                    inner = pool.submit(fn, *args, **kwargs)
+                except concurrent.futures.BrokenExecutor as e:
+                    self._in_pool -= 1
+                    self._isolated = False
+                    self._discard_pool(pool)
+                    if not self._requeue(job_id, task):
+                        outer.set_exception(e)
+                    continue
+                except Exception as e:
+                    self._in_pool -= 1
+                    self._isolated = False
+                    outer.set_exception(e)
+                    continue
+                inner.add_done_callback(functools.partial(self._on_task_done, job_id, task, pool))
+
+    def _on_task_done(self, job_id: str, task: Tuple, pool: concurrent.futures.Executor, inner: concurrent.futures.Future) -> None:
+        outer = task[0]
+        with self._lock:
+            self._in_pool -= 1
+            if task[4]:
+                self._isolated = False
+        try:
+            outer.set_result(inner.result())
+        except concurrent.futures.BrokenExecutor as e:
+            # Worker mati: semua task di pool itu ikut gagal, bukan hanya file penyebabnya
+            self._discard_pool(pool)
+            if not self._requeue(job_id, task):
+                outer.set_exception(e)
+        except Exception as e:
+            outer.set_exception(e)
+        self._dispatch()
+
+
+@functools.lru_cache(maxsize=None)
+def get_job_scheduler() -> JobScheduler:
+    """Satu scheduler per proses: batas job bersamaan berlaku lintas sesi Streamlit."""
+    return JobScheduler()
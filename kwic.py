@@ -0,0 +1,215 @@
+"""
+Indeks keyword-in-context (KWIC): posisi tiap kemunculan keyword beserta potongan teks
+di sekitarnya, disimpan di SQLite agar bisa dicari tanpa membuka ulang dokumen.
+
+Contoh:
+    python kwic.py --bank "Bank A" --keyword Blockchain --year 2021
+    python kwic.py --batch <job_id> --keyword AI
+"""
+import os
+import sys
+import sqlite3
+import argparse
+import logging
+import threading
+import functools
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+
+import cache
+
+logger = logging.getLogger(__name__)
+
+# KONFIGURASI KWIC
+# Subdirektori sendiri agar database tidak ikut dihitung/di-evict oleh ResultCache
+KWIC_DIR = os.environ.get("WORDCOUNTER_KWIC_DIR", os.path.join(cache.CACHE_DIR, "kwic"))
+# Jumlah karakter konteks di kiri dan kanan keyword
+KWIC_WINDOW = 80
+# Batas kemunculan yang disimpan per kategori per dokumen, menjaga indeks tetap ringkas
+# untuk keyword yang sangat umum (mis. "AI" di laporan teknologi)
+KWIC_MAX_HITS_PER_CATEGORY = 200
+
+# (kategori, halaman, offset di halaman, konteks kiri, term, konteks kanan)
+Hit = Tuple[str, int, int, str, str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_key   TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    hits      INTEGER NOT NULL,
+    PRIMARY KEY (doc_key, signature)
+);
+CREATE TABLE IF NOT EXISTS files (
+    doc_key  TEXT NOT NULL,
+    zip_name TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    bank     TEXT NOT NULL,
+    year     TEXT NOT NULL,
+    PRIMARY KEY (doc_key, zip_name, filename)
+);
+CREATE TABLE IF NOT EXISTS hits (
+    doc_key       TEXT NOT NULL,
+    signature     TEXT NOT NULL,
+    category      TEXT NOT NULL,
+    page          INTEGER NOT NULL,
+    offset        INTEGER NOT NULL,
+    left_context  TEXT NOT NULL,
+    term          TEXT NOT NULL,
+    right_context TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS batch_files (
+    batch    TEXT NOT NULL,
+    doc_key  TEXT NOT NULL,
+    zip_name TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    PRIMARY KEY (batch, doc_key, zip_name, filename)
+);
+CREATE INDEX IF NOT EXISTS hits_by_doc ON hits (doc_key, signature, category);
+CREATE INDEX IF NOT EXISTS files_by_bank ON files (bank, year);
+"""
+
+
+def _like_pattern(text: str) -> str:
+    # % dan _ dari input pengguna dicari sebagai karakter biasa (dipasangkan dengan ESCAPE '\')
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def make_hit(category: str, page: int, text: str, start: int, end: int) -> Hit:
+    """Potong konteks kiri/kanan dari teks halaman; whitespace dirapikan agar ringkas."""
+    left = " ".join(text[max(0, start - KWIC_WINDOW):start].split())
+    right = " ".join(text[end:end + KWIC_WINDOW].split())
+    return (category, page, start, left, text[start:end], right)
+
+
+class KwicIndex:
+    """
+    Indeks per isi dokumen (doc_key = key cache konten) dan signature matcher. Dokumen yang
+    sama di beberapa ZIP hanya diindeks sekali; tabel files memetakan ke bank/tahun/nama file,
+    tabel batch_files mencatat file mana yang termasuk batch (job) tertentu.
+    Dipakai bersamaan oleh banyak worker proses (WAL + busy timeout); tulis per dokumen
+    dalam satu transaksi.
+    """
+
+    def __init__(self, directory: str = KWIC_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), timeout=60, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def is_indexed(self, doc_key: str, signature: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM documents WHERE doc_key = ? AND signature = ?", (doc_key, signature)
+            ).fetchone()
+        return row is not None
+
+    def add_document(self, doc_key: str, signature: str, hits: List[Hit]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM hits WHERE doc_key = ? AND signature = ?", (doc_key, signature))
+            self._conn.executemany(
+                "INSERT INTO hits VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(doc_key, signature) + hit for hit in hits]
+            )
+            self._conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?)", (doc_key, signature, len(hits)))
+
+    def register_file(self, doc_key: str, zip_name: str, filename: str, bank: str, year: str, batch: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", (doc_key, zip_name, filename, bank, year)
+            )
+            if batch:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO batch_files VALUES (?, ?, ?, ?)", (batch, doc_key, zip_name, filename)
+                )
+
+    def has_batch(self, batch: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM batch_files WHERE batch = ? LIMIT 1", (batch,)).fetchone()
+        return row is not None
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        bank: Optional[Union[str, Sequence[str]]] = None,
+        year: Optional[str] = None,
+        text: Optional[str] = None,
+        signature: Optional[str] = None,
+        limit: int = 200,
+        batch: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Cari kemunculan keyword. Semua filter opsional; `bank` boleh satu nama atau daftar nama,
+        `text` mencari substring (tanpa beda huruf besar/kecil) di konteks + term, `batch`
+        membatasi ke file yang didaftarkan oleh batch (job) itu.
+        Hasil urut per bank, tahun, file, halaman.
+        """
+        clauses, params = [], []
+        if category:
+            clauses.append("h.category = ?")
+            params.append(category)
+        if bank:
+            banks = [bank] if isinstance(bank, str) else list(bank)
+            clauses.append(f"f.bank IN ({', '.join('?' * len(banks))})")
+            params.extend(banks)
+        if year:
+            clauses.append("f.year = ?")
+            params.append(str(year))
+        if text:
+            clauses.append("(h.left_context || ' ' || h.term || ' ' || h.right_context) LIKE ? ESCAPE '\\'")
+            params.append(_like_pattern(text))
+        if signature:
+            clauses.append("h.signature = ?")
+            params.append(signature)
+        if batch:
+            clauses.append(
+                "EXISTS (SELECT 1 FROM batch_files b WHERE b.batch = ? AND b.doc_key = f.doc_key "
+                "AND b.zip_name = f.zip_name AND b.filename = f.filename)"
+            )
+            params.append(batch)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            "SELECT f.bank, f.year, f.filename, h.category, h.page, h.left_context, h.term, h.right_context "
+            f"FROM hits h JOIN files f ON f.doc_key = h.doc_key {where} "
+            "ORDER BY f.bank, f.year, f.filename, h.page, h.offset LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit]).fetchall()
+        return [dict(row) for row in rows]
+
+
+@functools.lru_cache(maxsize=None)
+def get_kwic_index() -> Optional[KwicIndex]:
+    """Satu koneksi per proses (termasuk tiap worker). None jika direktori indeks tidak bisa dipakai."""
+    try:
+        return KwicIndex()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Indeks KWIC dinonaktifkan, {KWIC_DIR} tidak bisa dipakai: {e}")
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Cari keyword-in-context di laporan yang sudah diproses")
+    parser.add_argument("--keyword", help="Nama kategori keyword (mis. Blockchain)")
+    parser.add_argument("--bank", help="Nama bank (nama ZIP tanpa .zip)")
+    parser.add_argument("--year", help="Tahun laporan")
+    parser.add_argument("--text", help="Filter substring di konteks")
+    parser.add_argument("--batch", help="Hanya file dari batch ini (job id)")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    index = get_kwic_index()
+    if index is None:
+        return 2
+    hits = index.query(args.keyword, args.bank, args.year, args.text, limit=args.limit, batch=args.batch)
+    for hit in hits:
+        print(f"{hit['bank']} {hit['year']} {hit['filename']} hal. {hit['page']} [{hit['category']}]")
+        print(f"    ...{hit['left_context']} >>{hit['term']}<< {hit['right_context']}...")
+    print(f"{len(hits)} hasil", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
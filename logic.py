@@ -1,26 +1,125 @@
-import docx
-import fitz  
 import re
+import csv
+import itertools
+import json
+import time
+import threading
+import hashlib
+import zlib
 import zipfile
+import tarfile
 import io
 import os
+import posixpath
+import shutil
+import tempfile
+import subprocess
 import logging
+import collections
+import contextlib
 import concurrent.futures
-import pytesseract
-from pdf2image import convert_from_bytes
-from PIL import Image, ImageEnhance  
-from typing import List, Dict, Any, Union, Pattern, Tuple, Callable, Optional
+import functools
+import codecs
+import cache
+import kwic
+from typing import List, Dict, Any, Union, Pattern, Tuple, Callable, Optional, NamedTuple, Iterator, Iterable, IO, Collection, TYPE_CHECKING
+
+# PyMuPDF, python-docx, pdf2image, PIL dan pytesseract diimpor saat pertama dipakai (lihat
+# FORMAT_READERS), sehingga import logic tetap ringan untuk worker proses, CLI, dan batch TXT
+if TYPE_CHECKING:
+    import fitz
+    from PIL import Image
 
 # KONFIGURASI LOGGING
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%H:%M:%S'
-)
+# Dipasang oleh entry point (app.py, cli.py, benchmark.py) dan worker proses lewat
+# configure_logging(), bukan saat import, agar logic tidak mengubah logging root pemakainya
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_DATEFMT = '%H:%M:%S'
 logger = logging.getLogger(__name__)
 
+def configure_logging(level: int = logging.INFO) -> None:
+    logging.basicConfig(level=level, format=LOG_FORMAT, datefmt=LOG_DATEFMT)
+
+# Naikkan setiap kali logika ekstraksi/OCR berubah agar entry cache lama tidak dipakai lagi
+EXTRACTOR_VERSION = 5
+
+# KONFIGURASI DETEKSI SCAN
+# Jumlah halaman awal yang dipakai untuk memutuskan PDF scan vs native (0 = semua halaman)
+SCAN_SAMPLE_PAGES = int(os.environ.get("WORDCOUNTER_SCAN_SAMPLE_PAGES", "10"))
+SCAN_MIN_AVG_CHARS = 50
+# Halaman dengan teks di bawah batas ini DAN berisi gambar dianggap halaman scan (perlu OCR)
+SCAN_MIN_PAGE_CHARS = 50
+# Pre-classifier metadata (font, operator teks, luas gambar) tanpa ekstraksi teks:
+# halaman tanpa teks yang sebagian besar tertutup gambar dianggap halaman scan
+SCAN_MIN_IMAGE_COVERAGE = 0.5
+# Sampling berhenti lebih awal setelah sekian halaman informatif yang semuanya sepakat
+SCAN_EARLY_EXIT_PAGES = 3
+# Di bawah confidence ini keputusan diambil dari rata-rata karakter teks (cara lama)
+SCAN_MIN_CONFIDENCE = 0.8
+
 # KONFIGURASI OCR 
 MAX_OCR_PAGES = 50 
+OCR_DPI = 300
+OCR_LANG = 'eng+ind'
+OCR_CONFIG = '--psm 3'
+# adaptive : render cepat di OCR_FAST_DPI + preprocessing ringan; hanya halaman dengan
+#            confidence tesseract di bawah OCR_MIN_CONFIDENCE diulang di OCR_DPI + enhancement
+# fixed    : selalu OCR_DPI + enhancement (perilaku lama)
+OCR_MODE = os.environ.get("WORDCOUNTER_OCR_MODE", "adaptive")
+OCR_FAST_DPI = 200
+OCR_MIN_CONFIDENCE = float(os.environ.get("WORDCOUNTER_OCR_MIN_CONFIDENCE", "70"))
+# Jumlah halaman yang di-render + di-OCR bersamaan per file (tiap halaman = 1 proses tesseract).
+# Di executor proses, default dibagi rata antar worker (lihat _init_worker) agar N worker x OCR_WORKERS
+# tidak melebihi jumlah CPU; nilai dari env dipakai apa adanya di setiap worker.
+OCR_WORKERS = int(os.environ.get("WORDCOUNTER_OCR_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+# Batas raster halaman (~25 MB per halaman @300 DPI) yang boleh ada di memori sekaligus per file
+MAX_OCR_RASTERS = int(os.environ.get("WORDCOUNTER_MAX_OCR_RASTERS", "4"))
+# Batas halaman (teks/OCR) yang menunggu di-yield sesuai urutan pada mode hybrid
+MAX_QUEUED_PAGES = 64
+
+# Metrik OCR diakumulasi dari beberapa thread OCR sekaligus
+_METRICS_LOCK = threading.Lock()
+
+# KONFIGURASI EKSEKUSI
+# thread  : ringan, tapi ekstraksi/regex/PIL terbatas GIL
+# process : paralel penuh di semua core (default)
+# serial  : tanpa pool, untuk debugging
+EXECUTOR_MODES = ("thread", "process", "serial")
+DEFAULT_EXECUTOR_MODE = os.environ.get("WORDCOUNTER_EXECUTOR", "process")
+DEFAULT_MAX_WORKERS = int(os.environ.get("WORDCOUNTER_WORKERS", "0")) or None  # None = jumlah CPU
+# Maksimal file yang sedang diproses / menunggu per worker. Membatasi jumlah member ZIP
+# yang sudah didekompresi di memori, sehingga pemakaian RAM sebanding dengan jumlah worker.
+MAX_IN_FLIGHT_PER_WORKER = 2
+# Member ZIP di-spool ke file sementara di sini (default: direktori temp sistem) lalu dibuka
+# lewat path, sehingga isi file tidak disalin ke heap worker
+SPOOL_DIR = os.environ.get("WORDCOUNTER_SPOOL_DIR") or None
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+# KONFIGURASI HITUNG KATA
+# Ukuran potongan teks untuk count_total_words; TXT/DOCX/HTML satu halaman bisa berisi jutaan kata
+WORD_COUNT_CHUNK_CHARS = 64 * 1024
+
+# KONFIGURASI ARSIP
+# Ekstensi dokumen yang dianalisis = ekstensi yang terdaftar di FORMAT_READERS
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+# Kedalaman arsip bertingkat yang ditelusuri (ZIP berisi ZIP per bank = 1)
+MAX_ARCHIVE_DEPTH = int(os.environ.get("WORDCOUNTER_MAX_ARCHIVE_DEPTH", "3"))
+# Arsip dalam (inner ZIP/tar) yang diekstrak ke disk bersamaan
+EXPAND_WORKERS = int(os.environ.get("WORDCOUNTER_EXPAND_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+# Batas total byte hasil ekstraksi arsip dalam + isi tar per batch (pelindung zip bomb)
+MAX_EXPANDED_BYTES = int(os.environ.get("WORDCOUNTER_MAX_EXPANDED_MB", "20480")) * 1024 * 1024
+
+# KONFIGURASI DUPLIKAT
+# Dokumen berisi identik (salinan EN/ID byte-identik, file sama di folder berbeda) dianalisis
+# sekali dan hasilnya disalin ke setiap path
+DEDUPE_DOCUMENTS = os.environ.get("WORDCOUNTER_DEDUPE", "1") != "0"
+# Opsional: tandai dokumen yang hampir sama (mis. PDF yang disimpan ulang) lewat shingling teks
+NEAR_DUPLICATE_DETECTION = os.environ.get("WORDCOUNTER_NEAR_DUPLICATES", "0") == "1"
+# Perkiraan kemiripan Jaccard minimum untuk ditandai "Mirip Dengan"
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("WORDCOUNTER_NEAR_DUPLICATE_THRESHOLD", "0.9"))
+# Jumlah kata per shingle dan jumlah hash terkecil (bottom-k) yang disimpan per dokumen
+SHINGLE_WORDS = 5
+SKETCH_SIZE = 128
 
 # 1. DEFINISI POLA REGEX
 
@@ -54,22 +153,393 @@ INDO_PATTERNS: Dict[str, List[str]] = {
     "Digital Service": [r"layanan digital"]
 }
 
-def get_compiled_patterns(bilingual: bool = False) -> Dict[str, Pattern]:
-    compiled = {}
+def get_pattern_terms(bilingual: bool = False) -> Dict[str, List[str]]:
+    terms = {}
     for key, patterns in BASE_PATTERNS.items():
         combined_patterns = patterns.copy()
         if bilingual and key in INDO_PATTERNS:
-            combined_patterns.extend(INDO_PATTERNS[key])
-        regex_str = r"\b(" + "|".join(combined_patterns) + r")\b"
-        compiled[key] = re.compile(regex_str, re.IGNORECASE)
-    return compiled
+            combined_patterns.extend(p for p in INDO_PATTERNS[key] if p not in combined_patterns)
+        terms[key] = combined_patterns
+    return terms
+
+_REGEX_META = set(r".^$*+?{}[]\|()")
+
+# Dictionary dengan term sebanyak ini ke atas menyimpan hasil kompilasi matcher ke disk,
+# sehingga analisis overlap antar term tidak diulang di setiap run / worker proses.
+MATCHER_ARTIFACT_MIN_TERMS = 50
+MATCHER_ARTIFACT_DIR = os.path.join(cache.CACHE_DIR, "matchers")
+# Naikkan jika cara kompilasi pass berubah, agar artefak lama di disk tidak dipakai lagi
+MATCHER_SPEC_VERSION = 3
+
+# Nama kolom yang sudah dipakai baris hasil, tidak boleh jadi nama kategori
+RESERVED_COLUMNS = {
+    "Nama Bank", "Tahun", "Nama File", "Status", "Total Kata Dokumen", "Halaman Keyword", "Metrik",
+    "Duplikat Dari", "Mirip Dengan", "Kemiripan", "Sketsa"
+}
+
+def _literal_text(pattern: str) -> Optional[str]:
+    """
+    Kembalikan teks literal dari pattern regex yang sebenarnya hanya berisi karakter biasa
+    (termasuk hasil re.escape, misal r"e\-payment"), atau None jika pattern memakai fitur regex.
+    """
+    chars = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            if i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+                chars.append(pattern[i + 1])
+                i += 2
+                continue
+            return None
+        if ch in _REGEX_META:
+            return None
+        chars.append(ch)
+        i += 1
+    return "".join(chars)
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+def _has_boundary(s: str, i: int) -> bool:
+    return _is_word_char(s[i - 1]) != _is_word_char(s[i])
+
+def _terms_can_overlap(a: str, b: str) -> bool:
+    """
+    Cek apakah match literal `a` dan `b` (masing-masing diapit \\b) bisa berbagi karakter di teks,
+    misal "pembayaran digital" dan "digital banking" pada teks "pembayaran digital banking".
+    """
+    a, b = a.lower(), b.lower()
+    for x, y in ((a, b), (b, a)):
+        for i in range(len(x)):
+            if i > 0 and not _has_boundary(x, i):
+                continue
+            tail = x[i:]
+            if y.startswith(tail):
+                if len(y) == len(tail) or _has_boundary(y, len(tail)):
+                    return True
+            elif tail.startswith(y) and _has_boundary(x, i + len(y)):
+                return True
+    return False
+
+def _categories_conflict(terms_a: List[Optional[str]], terms_b: List[Optional[str]]) -> bool:
+    if None in terms_a or None in terms_b:
+        return True  # Regex non-literal: tidak bisa dibuktikan aman, pisahkan
+    return any(_terms_can_overlap(a, b) for a in terms_a for b in terms_b)
+
+def _partition_categories(literals: Dict[str, List[Optional[str]]]) -> List[List[str]]:
+    """
+    Kelompokkan kategori ke dalam 'pass' sehingga dalam satu pass tidak ada dua kategori
+    yang match-nya bisa tumpang tindih. Hasil hitungan per kategori jadi identik dengan
+    findall() per kategori, tapi teks cukup di-scan sekali per pass (biasanya hanya 1).
+    
+    Untuk dictionary besar, pasangan kategori hanya dicek detail jika berbagi minimal satu
+    token kata: dua term yang diawali & diakhiri huruf/angka hanya bisa tumpang tindih pada
+    token utuh (batas \\b di kedua sisi).
+    """
+    token_index: Dict[str, set] = collections.defaultdict(set)
+    loose = set()  # kategori dengan term regex / berujung tanda baca: dibandingkan ke semua
+    category_tokens: Dict[str, set] = {}
+    for key, terms in literals.items():
+        tokens = set()
+        for term in terms:
+            if term is None or not term or not _is_word_char(term[0]) or not _is_word_char(term[-1]):
+                loose.add(key)
+                continue
+            tokens.update(re.findall(r"\w+", term.lower()))
+        category_tokens[key] = tokens
+        for token in tokens:
+            token_index[token].add(key)
 
-PATTERNS_EN = get_compiled_patterns(bilingual=False)
-PATTERNS_BI = get_compiled_patterns(bilingual=True)
+    conflicts: Dict[str, set] = collections.defaultdict(set)
+    for key in literals:
+        if key in loose:
+            candidates = set(literals)
+        else:
+            candidates = set(loose)
+            for token in category_tokens[key]:
+                candidates |= token_index[token]
+        for other in candidates:
+            if other != key and other not in conflicts[key] and _categories_conflict(literals[key], literals[other]):
+                conflicts[key].add(other)
+                conflicts[other].add(key)
+
+    passes: List[List[str]] = []
+    for key in literals:
+        for group in passes:
+            if not conflicts[key].intersection(group):
+                group.append(key)
+                break
+        else:
+            passes.append([key])
+    return passes
+
+def _needs_ordered_alternation(terms: List[Optional[str]]) -> bool:
+    """
+    True jika satu term kategori adalah prefix (sampai batas kata) dari term lain yang ditulis
+    sesudahnya, misal ["bank", "bank digital"]: alternation berurutan (findall) mengambil "bank"
+    lalu "digital", trie mengambil match terpanjang, sehingga hitungannya berbeda.
+    """
+    position: Dict[str, int] = {}
+    for i, term in enumerate(terms):
+        if term is not None:
+            position.setdefault(term.lower(), i)
+    for term, i in position.items():
+        for k in range(1, len(term)):
+            if _has_boundary(term, k) and position.get(term[:k], i) < i:
+                return True
+    return False
+
+def _trie_regex(terms: List[str]) -> str:
+    """
+    Gabungkan term literal jadi satu regex berbentuk trie (prefix bersama di-share), sehingga
+    biaya per posisi teks tidak lagi sebanding dengan jumlah term seperti pada alternation biasa.
+    """
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?"
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+def _compile_pass_specs(categories: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """
+    Kategori literal dikompilasi sebagai trie + peta term -> kategori. Kategori dengan term
+    regex, atau yang urutan term-nya menentukan match (lihat _needs_ordered_alternation),
+    dipisah ke pass sendiri berisi alternation dengan named group per kategori; kategori lain
+    di grup yang sama tetap memakai trie (kategori dalam satu grup tidak tumpang tindih,
+    jadi memisahkannya tidak mengubah hitungan).
+    """
+    literals = {key: [_literal_text(p) for p in patterns] for key, patterns in categories.items()}
+    specs = []
+    for group in _partition_categories(literals):
+        ordered = [key for key in group if None in literals[key] or _needs_ordered_alternation(literals[key])]
+        trie_keys = [key for key in group if key not in ordered]
+        if trie_keys:
+            term_map = {term.lower(): key for key in trie_keys for term in literals[key]}
+            source = r"\b" + _trie_regex(list(term_map)) + r"\b"
+            specs.append({"source": source, "groups": {}, "terms": term_map})
+        if ordered:
+            group_names = {f"k{i}": key for i, key in enumerate(ordered)}
+            alternation = "|".join(
+                f"(?P<{name}>{'|'.join(categories[key])})" for name, key in group_names.items()
+            )
+            specs.append({"source": r"\b(?:" + alternation + r")\b", "groups": group_names, "terms": None})
+    return specs
+
+class KeywordMatcher:
+    """
+    Menghitung kemunculan semua kategori keyword dengan satu regex gabungan per pass
+    (trie untuk term literal, named group untuk term regex), semantik \\b...\\b + IGNORECASE.
+    Dibuat lewat build_keyword_matcher() agar hasil kompilasi di-cache per signature.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]], name: str = "", pass_specs: Optional[List[Dict[str, Any]]] = None):
+        self.name = name
+        self.categories: List[str] = list(categories.keys())
+        self.signature: str = matcher_signature(categories)
+        self._spec = categories
+        self._given_pass_specs = pass_specs
+
+    # Analisis overlap term dan kompilasi regex ditunda sampai matcher benar-benar menghitung;
+    # membuat matcher untuk signature/definisi job saja (mis. di UI) tidak membayar biaya ini
+    @functools.cached_property
+    def pass_specs(self) -> List[Dict[str, Any]]:
+        if self._given_pass_specs is not None:
+            return self._given_pass_specs
+        return _compile_pass_specs(self._spec)
+
+    @functools.cached_property
+    def _passes(self) -> List[Tuple[Pattern, Dict[str, str], Optional[Dict[str, str]]]]:
+        return [(re.compile(spec["source"], re.IGNORECASE), spec["groups"], spec["terms"]) for spec in self.pass_specs]
+
+    def __reduce__(self):
+        # Ke worker proses cukup kirim definisi; worker memakai cache matcher miliknya sendiri
+        return (build_keyword_matcher, (self._spec, self.name))
+
+    def definition(self) -> Dict[str, Any]:
+        """Definisi JSON-serializable; build_keyword_matcher(**definition) membangun ulang matcher yang sama."""
+        return {"categories": self._spec, "name": self.name}
+
+    @property
+    def pass_count(self) -> int:
+        return len(self._passes)
+
+    @property
+    def term_count(self) -> int:
+        return sum(len(patterns) for patterns in self._spec.values())
+
+    def _resolve_term(self, matched: str, term_map: Dict[str, str]) -> str:
+        # Fallback untuk huruf yang lower()-nya berbeda dengan case folding regex (jarang)
+        for term, key in term_map.items():
+            if re.fullmatch(re.escape(term), matched, re.IGNORECASE):
+                return key
+        raise KeyError(matched)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """Setiap kemunculan sebagai (kategori, start, end); jumlahnya sama dengan count()."""
+        if not text:
+            return
+        for regex, group_names, term_map in self._passes:
+            for match in regex.finditer(text):
+                if term_map is not None:
+                    matched = match.group()
+                    key = term_map.get(matched.lower())
+                    yield (key if key is not None else self._resolve_term(matched, term_map)), match.start(), match.end()
+                else:
+                    yield group_names[match.lastgroup], match.start(), match.end()
+
+    def count(self, text: str) -> Dict[str, int]:
+        counts = dict.fromkeys(self.categories, 0)
+        if not text:
+            return counts
+        for regex, group_names, term_map in self._passes:
+            if term_map is not None:
+                for match in regex.finditer(text):
+                    matched = match.group()
+                    key = term_map.get(matched.lower())
+                    counts[key if key is not None else self._resolve_term(matched, term_map)] += 1
+            else:
+                for match in regex.finditer(text):
+                    counts[group_names[match.lastgroup]] += 1
+        return counts
+
+def matcher_signature(categories: Dict[str, List[str]]) -> str:
+    # Urutan kategori ikut menentukan urutan kolom, jadi tidak di-sort
+    return hashlib.sha1(json.dumps(list(categories.items())).encode("utf-8")).hexdigest()
+
+_MATCHER_MEMO: Dict[str, KeywordMatcher] = {}
+
+def build_keyword_matcher(categories: Dict[str, List[str]], name: str = "") -> KeywordMatcher:
+    """
+    Matcher di-memo per proses berdasarkan signature dictionary; untuk dictionary besar hasil
+    kompilasi (regex source + peta term) juga disimpan di disk dan dipakai ulang lintas run.
+    """
+    signature = matcher_signature(categories)
+    matcher = _MATCHER_MEMO.get(signature)
+    if matcher is not None:
+        return matcher
+
+    persist = sum(len(p) for p in categories.values()) >= MATCHER_ARTIFACT_MIN_TERMS
+    artifact_path = os.path.join(MATCHER_ARTIFACT_DIR, f"{signature}.v{MATCHER_SPEC_VERSION}.json")
+    pass_specs = None
+    if persist:
+        try:
+            with open(artifact_path, "r", encoding="utf-8") as f:
+                pass_specs = json.load(f)["passes"]
+        except (OSError, ValueError, KeyError):
+            pass_specs = None
+
+    matcher = KeywordMatcher(categories, name, pass_specs)
+    if persist and pass_specs is None:
+        try:
+            os.makedirs(MATCHER_ARTIFACT_DIR, exist_ok=True)
+            tmp_path = f"{artifact_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"name": name, "passes": matcher.pass_specs}, f)
+            os.replace(tmp_path, artifact_path)
+        except OSError as e:
+            logger.warning(f"Gagal menyimpan artefak matcher: {e}")
+    _MATCHER_MEMO[signature] = matcher
+    return matcher
+
+def get_keyword_matcher(bilingual: bool = False) -> KeywordMatcher:
+    return build_keyword_matcher(get_pattern_terms(bilingual), "Default (EN + ID)" if bilingual else "Default (EN)")
+
+def load_keyword_dictionary(source: Union[str, bytes], filename: Optional[str] = None) -> KeywordMatcher:
+    """
+    Memuat dictionary keyword custom dari file YAML/JSON (path atau isi file + nama file).
+    
+    Format:
+        name: ESG                     # opsional
+        regex: false                  # opsional; true = term ditulis sebagai regex
+        categories:
+          Green Finance: [green finance, keuangan hijau, green bond]
+          Carbon: [carbon emission, emisi karbon]
+    
+    Mapping langsung {kategori: [term, ...]} tanpa key `categories` juga diterima.
+    """
+    if isinstance(source, str):
+        filename = filename or source
+        with open(source, "rb") as f:
+            source = f.read()
+    ext = os.path.splitext(filename or "")[1].lower()
+    content = source.decode("utf-8-sig")
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError("Dictionary YAML membutuhkan PyYAML (pip install pyyaml).") from e
+        data = yaml.safe_load(content)
+    else:
+        data = json.loads(content)
+
+    if not isinstance(data, dict):
+        raise ValueError("Dictionary harus berupa mapping kategori -> daftar term.")
+    if "categories" in data:
+        raw_categories = data["categories"]
+        use_regex = bool(data.get("regex", False))
+        name = str(data.get("name") or "")
+    else:
+        raw_categories, use_regex, name = data, False, ""
+    if not isinstance(raw_categories, dict) or not raw_categories:
+        raise ValueError("Dictionary tidak berisi kategori.")
+
+    categories: Dict[str, List[str]] = {}
+    for key, terms in raw_categories.items():
+        key = str(key).strip()
+        if key in RESERVED_COLUMNS:
+            raise ValueError(f"Nama kategori '{key}' bentrok dengan kolom hasil.")
+        if isinstance(terms, str):
+            terms = [terms]
+        if not isinstance(terms, list) or not all(isinstance(t, str) and t.strip() for t in terms):
+            raise ValueError(f"Kategori '{key}' harus berisi daftar term (teks).")
+        patterns = []
+        for term in terms:
+            pattern = term.strip() if use_regex else re.escape(term.strip())
+            if use_regex:
+                try:
+                    re.compile(pattern)
+                except re.error as e:
+                    raise ValueError(f"Regex tidak valid di kategori '{key}': {term} ({e})") from e
+            if pattern not in patterns:
+                patterns.append(pattern)
+        categories[key] = patterns
+
+    return build_keyword_matcher(categories, name or os.path.splitext(os.path.basename(filename or "dictionary"))[0])
+
+def __getattr__(name: str) -> Any:
+    # Kompatibilitas: MATCHER_EN / MATCHER_BI dulu dikompilasi saat import, sekarang saat pertama diakses
+    if name == "MATCHER_EN":
+        return get_keyword_matcher(bilingual=False)
+    if name == "MATCHER_BI":
+        return get_keyword_matcher(bilingual=True)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # 2. FUNGSI PEMBACAAN FILE
 
+@functools.lru_cache(maxsize=None)
+def get_fitz() -> Any:
+    """Modul PyMuPDF, diimpor sekali saat PDF pertama dibuka."""
+    try:
+        # PyMuPDF baru mencetak peringatan deprecation ke stdout saat `import fitz`,
+        # yang ikut mengotori output CSV CLI ke stdout
+        import pymupdf as fitz
+    except ImportError:
+        import fitz
+    return fitz
+
 def extract_year(filename: str, zip_name: str) -> str:
     year_pattern = r'\b(20\d{2}|19\d{2})\b'
     match_file = re.search(year_pattern, filename)
@@ -78,13 +548,35 @@ def extract_year(filename: str, zip_name: str) -> str:
     if match_zip: return match_zip.group(1)
     return "Unknown"
 
-def read_txt(file_bytes: bytes) -> str:
-    try: return file_bytes.decode("utf-8")
-    except UnicodeDecodeError: return file_bytes.decode("latin-1")
+# Sumber file untuk reader: isi file (bytes) atau path file di disk. Path dibaca langsung
+# oleh library (fitz, poppler, python-docx) tanpa salinan bytes tambahan di memori.
+FileSource = Union[bytes, str]
+
+@contextlib.contextmanager
+def _source_path(source: FileSource, suffix: str) -> Iterator[str]:
+    """Path untuk library yang hanya menerima file; bytes ditulis sekali ke file sementara."""
+    if isinstance(source, str):
+        yield source
+        return
+    with tempfile.NamedTemporaryFile(suffix=suffix, dir=SPOOL_DIR) as tmp:
+        tmp.write(source)
+        tmp.flush()
+        yield tmp.name
 
-def read_docx(file_bytes: bytes) -> str:
+def read_txt(source: FileSource) -> str:
+    if isinstance(source, str):
+        # Decode langsung dari file (newline="" agar teks identik dengan decode bytes)
+        try:
+            with open(source, "r", encoding="utf-8", newline="") as f: return f.read()
+        except UnicodeDecodeError:
+            with open(source, "r", encoding="latin-1", newline="") as f: return f.read()
+    try: return source.decode("utf-8")
+    except UnicodeDecodeError: return source.decode("latin-1")
+
+def read_docx(source: FileSource) -> str:
+    import docx
     try:
-        doc = docx.Document(io.BytesIO(file_bytes))
+        doc = docx.Document(source if isinstance(source, str) else io.BytesIO(source))
         paragraphs = [p.text for p in doc.paragraphs]
         tables = [cell.text for t in doc.tables for r in t.rows for cell in r.cells]
         return '\n'.join(paragraphs + tables)
@@ -92,14 +584,168 @@ def read_docx(file_bytes: bytes) -> str:
         logger.error(f"Error reading DOCX: {e}")
         return ""
 
-def preprocess_image_for_ocr(img: Image.Image) -> Image.Image:
+class UnsupportedFormatError(ValueError):
+    """Isi file tidak bisa dibaca oleh reader mana pun (atau tool eksternal reader-nya tidak ada)."""
+
+def read_doc(source: FileSource) -> str:
+    """Word 97-2003 (.doc) lewat antiword, tool sistem seperti tesseract/poppler untuk OCR."""
+    antiword = shutil.which("antiword")
+    if antiword is None:
+        raise UnsupportedFormatError("Format .doc membutuhkan antiword (apt-get install antiword).")
+    with _source_path(source, ".doc") as path:
+        # -w 0: tanpa word-wrap, -m UTF-8.txt: output UTF-8
+        result = subprocess.run([antiword, "-w", "0", "-m", "UTF-8.txt", path], capture_output=True, check=True)
+    return result.stdout.decode("utf-8", errors="replace")
+
+def _open_zip_source(source: FileSource) -> zipfile.ZipFile:
+    return zipfile.ZipFile(source if isinstance(source, str) else io.BytesIO(source))
+
+def _xml_name(tag: str) -> str:
+    # Nama tag tanpa namespace, sehingga OOXML transitional maupun strict dibaca sama
+    return tag.rsplit('}', 1)[-1]
+
+def _ooxml_parts(z: zipfile.ZipFile, main_part: str, item_tag: str) -> List[str]:
+    """Part sheet/slide sesuai urutan di workbook.xml / presentation.xml (lewat relationship r:id)."""
+    import xml.etree.ElementTree as ET
+    rels_part = posixpath.join(posixpath.dirname(main_part), "_rels", posixpath.basename(main_part) + ".rels")
+    with z.open(rels_part) as f:
+        targets = {rel.get("Id"): rel.get("Target", "") for rel in ET.parse(f).getroot()}
+    with z.open(main_part) as f:
+        rel_ids = [
+            next((v for k, v in el.attrib.items() if k.endswith("}id")), None)
+            for el in ET.parse(f).getroot().iter() if _xml_name(el.tag) == item_tag
+        ]
+    names = set(z.namelist())
+    parts = []
+    for rel_id in rel_ids:
+        target = targets.get(rel_id)
+        if not target:
+            continue
+        part = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(posixpath.dirname(main_part), target))
+        if part in names:
+            parts.append(part)
+    return parts
+
+def _rich_text(el: Any) -> str:
+    """Teks <si>/<is> spreadsheet: <t> langsung atau run <r><t>; teks fonetik <rPh> diabaikan."""
+    parts = []
+    for child in el:
+        name = _xml_name(child.tag)
+        if name == "t":
+            parts.append(child.text or "")
+        elif name == "r":
+            parts.extend(t.text or "" for t in child if _xml_name(t.tag) == "t")
+    return "".join(parts)
+
+def iter_xlsx_pages(source: FileSource) -> Iterator[str]:
+    """Excel (.xlsx): satu halaman per sheet, sel dibaca streaming (iterparse) baris demi baris."""
+    import xml.etree.ElementTree as ET
+    with _open_zip_source(source) as z:
+        shared_strings: List[str] = []
+        if "xl/sharedStrings.xml" in z.namelist():
+            with z.open("xl/sharedStrings.xml") as f:
+                for _, el in ET.iterparse(f):
+                    if _xml_name(el.tag) == "si":
+                        shared_strings.append(_rich_text(el))
+                        el.clear()
+        for part in _ooxml_parts(z, "xl/workbook.xml", "sheet"):
+            lines, row = [], []
+            with z.open(part) as f:
+                for _, el in ET.iterparse(f):
+                    name = _xml_name(el.tag)
+                    if name == "c":
+                        cell_type = el.get("t")
+                        value = next((child.text for child in el if _xml_name(child.tag) == "v"), None)
+                        if cell_type == "s" and value is not None:
+                            row.append(shared_strings[int(value)])
+                        elif cell_type == "inlineStr":
+                            row.append(next((_rich_text(child) for child in el if _xml_name(child.tag) == "is"), ""))
+                        elif cell_type not in ("b", "e") and value is not None:
+                            row.append(value)
+                    elif name == "row":
+                        lines.append("\t".join(row))
+                        row = []
+                        el.clear()
+            yield "\n".join(lines)
+
+def iter_pptx_pages(source: FileSource) -> Iterator[str]:
+    """PowerPoint (.pptx): satu halaman per slide sesuai urutan presentasi, satu baris per paragraf."""
+    import xml.etree.ElementTree as ET
+    with _open_zip_source(source) as z:
+        for part in _ooxml_parts(z, "ppt/presentation.xml", "sldId"):
+            lines = []
+            with z.open(part) as f:
+                for _, el in ET.iterparse(f):
+                    if _xml_name(el.tag) == "p":
+                        lines.append("".join(t.text or "" for t in el.iter() if _xml_name(t.tag) == "t"))
+                        el.clear()
+            yield "\n".join(lines)
+
+@functools.lru_cache(maxsize=None)
+def _html_text_extractor() -> type:
+    # Kelas dibuat saat HTML pertama dibaca agar html.parser tidak ikut diimpor di startup
+    import html.parser
+
+    class HTMLTextExtractor(html.parser.HTMLParser):
+        """Teks yang tampil di halaman HTML/XHTML; script, style dan header iXBRL tersembunyi dibuang."""
+        SKIP_TAGS = {"script", "style", "template", "ix:header"}
+        BLOCK_TAGS = {
+            "p", "div", "br", "tr", "td", "th", "li", "ul", "ol", "table", "section", "article", "header",
+            "footer", "h1", "h2", "h3", "h4", "h5", "h6", "title", "blockquote", "pre", "hr", "dt", "dd",
+        }
+
+        def __init__(self):
+            super().__init__(convert_charrefs=True)
+            self.parts: List[str] = []
+            self._skip_depth = 0
+
+        def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+            if tag in self.SKIP_TAGS:
+                self._skip_depth += 1
+            elif tag in self.BLOCK_TAGS:
+                self.parts.append("\n")
+
+        def handle_endtag(self, tag: str) -> None:
+            if tag in self.SKIP_TAGS:
+                self._skip_depth = max(0, self._skip_depth - 1)
+            elif tag in self.BLOCK_TAGS:
+                self.parts.append("\n")
+
+        def handle_data(self, data: str) -> None:
+            if not self._skip_depth:
+                self.parts.append(data)
+
+    return HTMLTextExtractor
+
+def read_html(source: FileSource) -> str:
+    """HTML/XHTML (mis. laporan IDX): parser di-feed per blok, decode UTF-8 dengan fallback latin-1 seperti TXT."""
+    for encoding in ("utf-8-sig", "latin-1"):
+        parser = _html_text_extractor()()
+        decoder = codecs.getincrementaldecoder(encoding)()
+        stream = open(source, "rb") if isinstance(source, str) else io.BytesIO(source)
+        try:
+            with stream:
+                for chunk in iter(functools.partial(stream.read, SPOOL_CHUNK_BYTES), b""):
+                    parser.feed(decoder.decode(chunk))
+                parser.feed(decoder.decode(b"", final=True))
+        except UnicodeDecodeError:
+            continue
+        parser.close()
+        return "".join(parser.parts)
+    return ""
+
+def preprocess_image_for_ocr(img: "Image.Image", enhance: bool = True) -> "Image.Image":
     """
     Meningkatkan kualitas gambar untuk hasil OCR yang lebih baik pada dokumen scan/buram.
+    enhance=False hanya grayscale (tier cepat untuk scan yang sudah bersih).
     """
     # 1. Konversi ke Grayscale (L)
     img = img.convert('L')
+    if not enhance:
+        return img
     
     # 2. Tingkatkan Kontras (Membantu memisahkan teks pudar dari background)
+    from PIL import ImageEnhance
     enhancer_contrast = ImageEnhance.Contrast(img)
     img = enhancer_contrast.enhance(2.0)  # Naikkan kontras 2x lipat
     
@@ -109,100 +755,736 @@ def preprocess_image_for_ocr(img: Image.Image) -> Image.Image:
     
     return img
 
-def read_pdf_ocr(file_bytes: bytes, filename: str) -> str:
+def _render_page(pdf_path: str, page_number: int, dpi: int) -> Optional["Image.Image"]:
+    from pdf2image import convert_from_path
+    images = convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        fmt='jpeg',
+        grayscale=True,
+        first_page=page_number,
+        last_page=page_number
+    )
+    return images[0] if images else None
+
+def _ocr_with_confidence(img: "Image.Image") -> Tuple[str, float]:
+    """
+    OCR via image_to_data. Returns: (teks per baris, rata-rata confidence kata 0-100).
+    Halaman tanpa kata terbaca dianggap confidence 0 agar tetap dicoba ulang di tier tinggi.
+    """
+    import pytesseract
+    data = pytesseract.image_to_data(img, lang=OCR_LANG, config=OCR_CONFIG, output_type=pytesseract.Output.DICT)
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    confidences = []
+    for i, word in enumerate(data["text"]):
+        conf = float(data["conf"][i])
+        if conf < 0 or not word.strip():
+            continue
+        lines.setdefault((data["block_num"][i], data["par_num"][i], data["line_num"][i]), []).append(word)
+        confidences.append(conf)
+    text = '\n'.join(' '.join(words) for words in lines.values())
+    return text, (sum(confidences) / len(confidences) if confidences else 0.0)
+
+def _ocr_single_page(pdf_path: str, page_number: int, metrics: Optional[Dict[str, float]] = None) -> str:
+    """Render satu halaman lalu OCR. Raster langsung dilepas setelah halaman selesai."""
+    # Import saat dipakai: pytesseract ikut meng-import pandas (~0.5 detik) yang tidak
+    # dibutuhkan CLI / worker untuk batch tanpa OCR.
+    import pytesseract
+    # Tesseract memakai OpenMP secara default; karena halaman sudah diparalelkan, batasi 1 thread
+    # per proses tesseract. Diset di sini (bukan saat import) agar env proses pemakai logic tidak berubah.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    if OCR_MODE == "adaptive":
+        image = _render_page(pdf_path, page_number, OCR_FAST_DPI)
+        if image is None:
+            return ""
+        text, confidence = _ocr_with_confidence(preprocess_image_for_ocr(image, enhance=False))
+        del image
+        if confidence >= OCR_MIN_CONFIDENCE:
+            return text
+        # Scan buram / pudar: ulangi di resolusi penuh dengan contrast + sharpening
+        _add_metric(metrics, "ocr_retries", 1)
+    
+    image = _render_page(pdf_path, page_number, OCR_DPI)
+    if image is None:
+        return ""
+    processed_img = preprocess_image_for_ocr(image)
+    return pytesseract.image_to_string(processed_img, lang=OCR_LANG, config=OCR_CONFIG)
+
+def _add_metric(metrics: Optional[Dict[str, float]], key: str, amount: float) -> None:
+    if metrics is None:
+        return
+    with _METRICS_LOCK:
+        metrics[key] = metrics.get(key, 0) + amount
+
+def _timed_ocr_page(pdf_path: str, page_number: int, metrics: Optional[Dict[str, float]]) -> str:
+    start = time.perf_counter()
+    try:
+        return _ocr_single_page(pdf_path, page_number, metrics)
+    finally:
+        _add_metric(metrics, "ocr_ms", (time.perf_counter() - start) * 1000)
+        _add_metric(metrics, "ocr_pages", 1)
+
+def iter_pdf_ocr_pages(source: FileSource, filename: str, metrics: Optional[Dict[str, float]] = None) -> Iterator[str]:
     """
     OCR Robust: Menggunakan DPI tinggi dan Preprocessing Citra.
+    Halaman di-render dan di-OCR secara paralel (pipeline per halaman), dengan maksimal
+    MAX_OCR_RASTERS raster di memori, lalu teks di-yield per halaman sesuai urutan.
     """
+    from pdf2image import pdfinfo_from_path
     logger.info(f"[{filename}] Memulai proses OCR Enhanced...")
-    text_content = []
-    try:
-        images = convert_from_bytes(
-            file_bytes, 
-            dpi=300, 
-            fmt='jpeg', 
-            grayscale=True, #
-            last_page=MAX_OCR_PAGES
-        )
-        
-        total_pages_scanned = len(images)
-        logger.info(f"[{filename}] Mengonversi {total_pages_scanned} halaman pertama (300 DPI).")
-        
-        for i, img in enumerate(images):
-            if (i + 1) % 5 == 0:
-                logger.info(f"[{filename}] OCR processing page {i+1}/{total_pages_scanned}")
-            
-            processed_img = preprocess_image_for_ocr(img)
+    # Poppler butuh file; bytes ditulis sekali agar tiap halaman tidak menyalin ulang seluruh PDF
+    with _source_path(source, ".pdf") as pdf_path:
+        try:
+            page_count = int(pdfinfo_from_path(pdf_path)["Pages"])
+            total_pages_scanned = min(page_count, MAX_OCR_PAGES)
+            workers = max(1, min(OCR_WORKERS, MAX_OCR_RASTERS))
+            dpi_label = f"{OCR_FAST_DPI}/{OCR_DPI} DPI adaptif" if OCR_MODE == "adaptive" else f"{OCR_DPI} DPI"
+            logger.info(f"[{filename}] OCR {total_pages_scanned} halaman pertama ({dpi_label}, {workers} worker).")
             
-            text = pytesseract.image_to_string(processed_img, lang='eng+ind', config='--psm 3') 
-            text_content.append(text)
-            
-        logger.info(f"[{filename}] OCR selesai ({total_pages_scanned} halaman).")
-        return '\n'.join(text_content)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_timed_ocr_page, pdf_path, n, metrics) for n in range(1, total_pages_scanned + 1)]
+                for i, future in enumerate(futures):
+                    if (i + 1) % 5 == 0:
+                        logger.info(f"[{filename}] OCR processing page {i+1}/{total_pages_scanned}")
+                    yield _resolve_page(future, filename, metrics)
+                
+            logger.info(f"[{filename}] OCR selesai ({total_pages_scanned} halaman).")
+        except Exception as e:
+            logger.error(f"[{filename}] OCR Gagal: {e}")
+            _add_metric(metrics, "page_errors", 1)
+
+def read_pdf_ocr(source: FileSource, filename: str) -> str:
+    return '\n'.join(iter_pdf_ocr_pages(source, filename))
+
+def _page_needs_ocr(page: "fitz.Page", text: str) -> bool:
+    # Halaman kosong tanpa gambar tidak perlu di-OCR
+    return len(text.strip()) < SCAN_MIN_PAGE_CHARS and bool(page.get_images())
+
+class ScanVerdict(NamedTuple):
+    is_scanned: bool
+    confidence: float
+    sampled: int
+    scan_pages: int
+    native_pages: int
+
+_TEXT_OPERATOR = re.compile(rb"\bBT\b")
+
+def _sample_page_indices(page_count: int) -> List[int]:
+    # Tersebar di seluruh dokumen: cover / halaman awal laporan sering berupa gambar penuh
+    if SCAN_SAMPLE_PAGES <= 0 or page_count <= SCAN_SAMPLE_PAGES:
+        return list(range(page_count))
+    # Titik tengah tiap segmen (bukan kelipatan step) agar tidak sejajar dengan pola halaman berulang
+    step = page_count / SCAN_SAMPLE_PAGES
+    return [int((i + 0.5) * step) for i in range(SCAN_SAMPLE_PAGES)]
+
+def _classify_page(page: "fitz.Page") -> Optional[bool]:
+    """
+    True = halaman scan, False = halaman native, None = tidak informatif (kosong, ornamen,
+    atau font tanpa operator teks). Hanya membaca resource dan content stream halaman.
+    """
+    if page.get_fonts() and _TEXT_OPERATOR.search(page.read_contents() or b""):
+        return False
+    if not page.get_images():
+        return None
+    page_area = abs(page.rect)
+    if not page_area:
+        return None
+    fitz = get_fitz()
+    covered = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    return True if covered / page_area >= SCAN_MIN_IMAGE_COVERAGE else None
+
+def classify_pdf(doc: "fitz.Document") -> ScanVerdict:
+    """
+    Pre-classifier scan vs native dari metadata halaman sampel (tanpa get_text).
+    confidence = kesepakatan antar halaman informatif x kecukupan sampel (maks 1.0).
+    """
+    scan_pages = native_pages = sampled = 0
+    for page_index in _sample_page_indices(len(doc)):
+        verdict = _classify_page(doc[page_index])
+        sampled += 1
+        if verdict is True:
+            scan_pages += 1
+        elif verdict is False:
+            native_pages += 1
+        informative = scan_pages + native_pages
+        if informative >= SCAN_EARLY_EXIT_PAGES and min(scan_pages, native_pages) == 0:
+            break
+    informative = scan_pages + native_pages
+    if not informative:
+        return ScanVerdict(False, 0.0, sampled, 0, 0)
+    agreement = max(scan_pages, native_pages) / informative
+    confidence = agreement * min(1.0, informative / SCAN_EARLY_EXIT_PAGES)
+    return ScanVerdict(scan_pages > native_pages, round(confidence, 2), sampled, scan_pages, native_pages)
+
+def _resolve_page(item: Union[str, concurrent.futures.Future], filename: str, metrics: Optional[Dict[str, float]] = None) -> str:
+    if isinstance(item, str):
+        return item
+    try:
+        return item.result()
     except Exception as e:
-        logger.error(f"[{filename}] OCR Gagal: {e}")
+        # Halaman tetap dilewati agar sisa dokumen terhitung, tapi hasilnya ditandai tidak lengkap
+        logger.error(f"[{filename}] OCR halaman gagal: {e}")
+        _add_metric(metrics, "page_errors", 1)
         return ""
 
-def read_pdf(file_bytes: bytes, filename: str, include_scanned: bool = False) -> Tuple[str, bool]:
+def _iter_hybrid_pages(
+    doc: "fitz.Document", 
+    sample: List[str], 
+    source: FileSource, 
+    filename: str, 
+    ocr_enabled: bool, 
+    ocr_budget: Optional[int],
+    metrics: Optional[Dict[str, float]] = None
+) -> Iterator[str]:
     """
-    Returns: Tuple[str, bool] -> (Extracted Text, Is_Skipped)
+    Klasifikasi per halaman: halaman native memakai get_text(), hanya halaman gambar
+    (tanpa text layer) yang di-render + OCR di thread pool. Urutan halaman tetap terjaga;
+    producer ditahan bila antrean halaman / OCR yang belum selesai sudah penuh.
     """
+    workers = max(1, min(OCR_WORKERS, MAX_OCR_RASTERS))
+    max_pending_ocr = workers * 2
+    queue: collections.deque = collections.deque()
+    executor = None
+    pdf_path = None
+    path_context = contextlib.ExitStack()
+    ocr_pages = 0
     try:
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
-        full_text = ""
-        for page in doc:
-            full_text += page.get_text()
+        for page_index in range(len(doc)):
+            page = doc[page_index]
+            text = sample[page_index] if page_index < len(sample) else page.get_text()
+            within_budget = ocr_budget is None or ocr_pages < ocr_budget
+            if ocr_enabled and within_budget and _page_needs_ocr(page, text):
+                if executor is None:
+                    # Poppler butuh file; sumber bytes ditulis sekali untuk semua halaman yang di-OCR
+                    pdf_path = path_context.enter_context(_source_path(source, ".pdf"))
+                    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+                queue.append(executor.submit(_timed_ocr_page, pdf_path, page_index + 1, metrics))
+                ocr_pages += 1
+            else:
+                queue.append(text)
+            
+            while queue:
+                pending_ocr = sum(1 for item in queue if not isinstance(item, str))
+                head_ready = isinstance(queue[0], str) or queue[0].done()
+                if not (head_ready or pending_ocr >= max_pending_ocr or len(queue) > MAX_QUEUED_PAGES):
+                    break
+                yield _resolve_page(queue.popleft(), filename, metrics)
         
-        # Logika Deteksi Scan
-        char_count = len(full_text.strip())
+        while queue:
+            yield _resolve_page(queue.popleft(), filename, metrics)
+        if ocr_pages:
+            logger.info(f"[{filename}] OCR selesai ({ocr_pages} dari {len(doc)} halaman).")
+    except Exception as e:
+        logger.warning(f"[{filename}] Ekstraksi PDF berhenti di tengah dokumen: {e}")
+        _add_metric(metrics, "page_errors", 1)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        path_context.close()
+        doc.close()
+
+def read_pdf_pages(
+    source: FileSource, 
+    filename: str, 
+    include_scanned: bool = False, 
+    metrics: Optional[Dict[str, float]] = None
+) -> Tuple[Iterator[str], bool]:
+    """
+    Versi streaming dari read_pdf: teks di-yield halaman per halaman, tidak pernah
+    digabung jadi satu string. Deteksi scan dokumen hanya memakai SCAN_SAMPLE_PAGES
+    halaman awal; jika OCR diizinkan, tiap halaman gambar di-OCR secara individual.
+    Source berupa path dibuka langsung oleh fitz (halaman dibaca dari file saat dibutuhkan).
+    Returns: Tuple[Iterator[str], bool] -> (Page Texts, Is_Skipped)
+    """
+    fitz = get_fitz()
+    try:
+        doc = fitz.open(source, filetype="pdf") if isinstance(source, str) else fitz.open(stream=source, filetype="pdf")
         page_count = len(doc)
-        avg_chars = char_count / page_count if page_count > 0 else 0
         
-        is_scanned = avg_chars < 50 
+        # Logika Deteksi Scan: pre-classifier metadata dulu, ekstraksi teks sampel hanya jika ragu
+        start = time.perf_counter()
+        verdict = classify_pdf(doc)
+        sample: List[str] = []
+        if verdict.confidence >= SCAN_MIN_CONFIDENCE:
+            is_scanned = verdict.is_scanned
+            reason = f"confidence {verdict.confidence:.2f}, sampel {verdict.sampled} halaman"
+        else:
+            sample_size = page_count if SCAN_SAMPLE_PAGES <= 0 else min(SCAN_SAMPLE_PAGES, page_count)
+            sample = [doc[i].get_text() for i in range(sample_size)]
+            char_count = sum(len(text.strip()) for text in sample)
+            avg_chars = char_count / sample_size if sample_size > 0 else 0
+            is_scanned = avg_chars < SCAN_MIN_AVG_CHARS
+            reason = f"Avg chars: {avg_chars:.1f}, sampel {sample_size} halaman, confidence metadata {verdict.confidence:.2f}"
+        _add_metric(metrics, "classify_ms", (time.perf_counter() - start) * 1000)
+        if metrics is not None:
+            metrics["scan_confidence"] = verdict.confidence
         
         if is_scanned:
-            logger.warning(f"[{filename}] Terdeteksi sebagai SCAN (Avg chars: {avg_chars:.1f}).")
+            logger.warning(f"[{filename}] Terdeteksi sebagai SCAN ({reason}).")
             
             if not include_scanned:
+                doc.close()
                 logger.info(f"[{filename}] SKIPPING file karena opsi 'Include Scanned' tidak dicentang.")
-                return "", True 
+                return iter(()), True 
             
-            return read_pdf_ocr(file_bytes, filename), False
+            # Dokumen scan penuh tetap dibatasi MAX_OCR_PAGES halaman OCR
+            return _iter_hybrid_pages(doc, sample, source, filename, True, MAX_OCR_PAGES, metrics), False
             
-        logger.info(f"[{filename}] Ekstraksi teks PDF native berhasil.")
-        return full_text, False
+        logger.info(f"[{filename}] Ekstraksi teks PDF native ({page_count} halaman, {reason}).")
+        # Dokumen campuran: halaman scan (lampiran, cover) di-OCR tanpa batas MAX_OCR_PAGES
+        return _iter_hybrid_pages(doc, sample, source, filename, include_scanned, None, metrics), False
         
     except Exception as e:
         logger.warning(f"[{filename}] Gagal baca native PDF: {e}. Mencoba OCR jika diizinkan.")
         if include_scanned:
-            return read_pdf_ocr(file_bytes, filename), False
-        return "", True
+            return iter_pdf_ocr_pages(source, filename, metrics), False
+        return iter(()), True
+
+def read_pdf(file_bytes: bytes, filename: str, include_scanned: bool = False) -> Tuple[str, bool]:
+    """
+    Returns: Tuple[str, bool] -> (Extracted Text, Is_Skipped)
+    """
+    pages, is_skipped = read_pdf_pages(file_bytes, filename, include_scanned)
+    return ''.join(pages), is_skipped
 
 def count_total_words(text: str) -> int:
+    """
+    Jumlah kata dengan semantik str.split() (dipisah whitespace Unicode), dihitung per potongan
+    WORD_COUNT_CHUNK_CHARS karakter: list token sementara sebesar satu potongan, bukan satu dokumen.
+    Kata yang terbelah di batas potongan dihitung sekali.
+    """
     if not text: return 0
-    return len(text.split())
+    if len(text) <= WORD_COUNT_CHUNK_CHARS:
+        return len(text.split())
+    total = 0
+    word_open = False
+    for start in range(0, len(text), WORD_COUNT_CHUNK_CHARS):
+        chunk = text[start:start + WORD_COUNT_CHUNK_CHARS]
+        total += len(chunk.split())
+        if word_open and not chunk[0].isspace():
+            total -= 1
+        word_open = not chunk[-1].isspace()
+    return total
 
 
 # 3. LOGIKA UTAMA (ANALISIS)
 
+# Reader per format: ekstensi + magic bytes (awal file) untuk sniffing isi, dan handler
+# (filename, source, include_scanned, metrics) -> (Page Texts, Is_Skipped). Halaman di-yield
+# bertahap (per halaman PDF / sheet / slide) dan library reader diimpor di dalam handler, jadi
+# batch berisi TXT saja tidak pernah memuat PyMuPDF / python-docx / OCR.
+FormatHandler = Callable[[str, FileSource, bool, Optional[Dict[str, float]]], Tuple[Iterator[str], bool]]
+
+class FormatReader(NamedTuple):
+    name: str
+    extensions: Tuple[str, ...]
+    magic: Tuple[bytes, ...]     # awalan isi file (huruf kecil, setelah BOM/whitespace); kosong = tidak bisa di-sniff
+    zip_marker: Optional[str]    # format berbasis ZIP (OOXML): member yang wajib ada
+    handler: FormatHandler
+    magic_window: int = 0        # >0: magic boleh muncul di N byte pertama (file ber-ekstensi format ini)
+
+# Urutan registrasi = urutan sniffing
+FORMAT_READERS: Dict[str, FormatReader] = {}
+_READER_BY_EXTENSION: Dict[str, FormatReader] = {}
+# Byte awal file yang dibaca untuk sniffing
+SNIFF_BYTES = 2048
+_ZIP_MAGIC = b"pk\x03\x04"
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+def register_format(
+    name: str,
+    *extensions: str,
+    magic: Tuple[bytes, ...] = (),
+    zip_marker: Optional[str] = None,
+    magic_window: int = 0
+) -> Callable[[FormatHandler], FormatHandler]:
+    """Decorator: daftarkan handler format; reader dengan nama sama menggantikan yang lama."""
+    def decorator(handler: FormatHandler) -> FormatHandler:
+        reader = FormatReader(name, tuple(ext.lower() for ext in extensions), tuple(m.lower() for m in magic), zip_marker, handler, magic_window)
+        FORMAT_READERS[name] = reader
+        for ext in reader.extensions:
+            _READER_BY_EXTENSION[ext] = reader
+        return handler
+    return decorator
+
+def is_supported_document(filename: str) -> bool:
+    return os.path.splitext(filename)[1].lower() in _READER_BY_EXTENSION
+
+def _read_head(source: FileSource) -> bytes:
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return f.read(SNIFF_BYTES)
+    return source[:SNIFF_BYTES]
+
+def _matches_magic(reader: FormatReader, head: bytes, source: FileSource, declared: bool = False) -> bool:
+    normalized = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if declared and reader.magic_window:
+        # Hanya untuk ekstensi yang cocok: teks biasa yang kebetulan memuat "%PDF-" tidak ikut di-sniff
+        window = head[:reader.magic_window + max(len(m) for m in reader.magic)].lower()
+        matched = any(m in window for m in reader.magic)
+    else:
+        matched = any(normalized.startswith(m) for m in reader.magic)
+    if not matched:
+        return False
+    if reader.zip_marker is None:
+        return True
+    try:
+        with _open_zip_source(source) as z:
+            return reader.zip_marker in z.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+def _looks_binary(head: bytes) -> bool:
+    # Teks biasa tidak memuat NUL; awalan magic yang dikenal tapi tidak lolos sniffing
+    # (mis. ZIP tanpa marker DOCX/XLSX/PPTX) juga bukan teks
+    normalized = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    return b"\0" in head or any(normalized.startswith(m) for r in FORMAT_READERS.values() for m in r.magic)
+
+def resolve_reader(filename: str, source: FileSource) -> Optional[FormatReader]:
+    """
+    Reader untuk file: isi file (magic bytes) diutamakan, ekstensi dipakai jika isi tidak
+    bisa di-sniff. File salah nama (PDF bernama .docx, HTML bernama .txt) dibaca sesuai isinya;
+    isi biner yang tidak dikenali memunculkan UnsupportedFormatError (status ERROR, bukan 0 kata).
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    declared = _READER_BY_EXTENSION.get(ext)
+    head = _read_head(source)
+    if declared is not None and declared.magic and _matches_magic(declared, head, source, declared=True):
+        return declared
+    sniffed = next((r for r in FORMAT_READERS.values() if r is not declared and r.magic and _matches_magic(r, head, source)), None)
+    if sniffed is not None:
+        if declared is not None:
+            logger.warning(f"[{filename}] Isi file terdeteksi sebagai {sniffed.name}, bukan {ext}; dibaca sebagai {sniffed.name}.")
+        return sniffed
+    if declared is None:
+        return None
+    if not _looks_binary(head):
+        if not declared.magic:
+            return declared
+        logger.warning(f"[{filename}] Isi file bukan {declared.name}; dibaca sebagai teks biasa.")
+        return FORMAT_READERS["TXT"]
+    raise UnsupportedFormatError(f"Isi file tidak cocok dengan format {declared.name} maupun format lain yang didukung.")
+
+# Spesifikasi PDF mengizinkan header di mana saja dalam 1024 byte pertama (PyMuPDF tetap membukanya)
+@register_format("PDF", '.pdf', magic=(b"%PDF-",), magic_window=1024)
+def _pdf_handler(filename: str, source: FileSource, include_scanned: bool, metrics: Optional[Dict[str, float]]) -> Tuple[Iterator[str], bool]:
+    return read_pdf_pages(source, filename, include_scanned, metrics)
+
+# DOCX, DOC, HTML dan TXT tidak punya konsep halaman, jadi dianggap satu halaman
+@register_format("DOCX", '.docx', magic=(_ZIP_MAGIC,), zip_marker="word/document.xml")
+def _docx_handler(filename: str, source: FileSource, include_scanned: bool, metrics: Optional[Dict[str, float]]) -> Tuple[Iterator[str], bool]:
+    return iter([read_docx(source)]), False
+
+@register_format("XLSX", '.xlsx', magic=(_ZIP_MAGIC,), zip_marker="xl/workbook.xml")
+def _xlsx_handler(filename: str, source: FileSource, include_scanned: bool, metrics: Optional[Dict[str, float]]) -> Tuple[Iterator[str], bool]:
+    return iter_xlsx_pages(source), False
+
+@register_format("PPTX", '.pptx', magic=(_ZIP_MAGIC,), zip_marker="ppt/presentation.xml")
+def _pptx_handler(filename: str, source: FileSource, include_scanned: bool, metrics: Optional[Dict[str, float]]) -> Tuple[Iterator[str], bool]:
+    return iter_pptx_pages(source), False
+
+@register_format("DOC", '.doc', magic=(_OLE_MAGIC,))
+def _doc_handler(filename: str, source: FileSource, include_scanned: bool, metrics: Optional[Dict[str, float]]) -> Tuple[Iterator[str], bool]:
+    return iter([read_doc(source)]), False
+
+@register_format("HTML", '.html', '.htm', '.xhtml', magic=(b"<!doctype html", b"<html", b"<?xml"))
+def _html_handler(filename: str, source: FileSource, include_scanned: bool, metrics: Optional[Dict[str, float]]) -> Tuple[Iterator[str], bool]:
+    return iter([read_html(source)]), False
+
+@register_format("TXT", '.txt')
+def _txt_handler(filename: str, source: FileSource, include_scanned: bool, metrics: Optional[Dict[str, float]]) -> Tuple[Iterator[str], bool]:
+    return iter([read_txt(source)]), False
+
+def extract_pages(
+    filename: str, 
+    source: FileSource, 
+    include_scanned: bool = False, 
+    metrics: Optional[Dict[str, float]] = None
+) -> Tuple[Iterator[str], bool]:
+    """
+    Returns: Tuple[Iterator[str], bool] -> (Page Texts, Is_Skipped)
+    Format dipilih oleh resolve_reader (isi file, lalu ekstensi); format tidak dikenal = dokumen kosong.
+    """
+    reader = resolve_reader(filename, source)
+    if reader is None:
+        return iter(()), False
+    return reader.handler(filename, source, include_scanned, metrics)
+
+class ShingleSketch:
+    """
+    Sketsa bottom-k dari shingle SHINGLE_WORDS kata (huruf kecil), dibangun per halaman tanpa
+    menyimpan teks; shingle yang melewati batas halaman tetap terhitung. Dua sketsa
+    memperkirakan kemiripan Jaccard isi dua dokumen (lihat sketch_similarity).
+    """
+
+    def __init__(self, size: int = SKETCH_SIZE, shingle_words: int = SHINGLE_WORDS):
+        import numpy as np
+        self.size = size
+        self.shingle_words = shingle_words
+        self._tail = np.zeros(0, dtype=np.uint64)
+        self._hashes = np.zeros(0, dtype=np.uint64)
+
+    def update(self, text: str) -> None:
+        import numpy as np
+        words = text.lower().split()
+        if not words:
+            return
+        word_hashes = np.fromiter(map(zlib.crc32, map(str.encode, words)), dtype=np.uint64, count=len(words))
+        window = np.concatenate([self._tail, word_hashes])
+        self._tail = window[len(window) - self.shingle_words + 1:]
+        count = len(window) - self.shingle_words + 1
+        if count <= 0:
+            return
+        # Hash shingle = polinomial hash kata berurutan (overflow uint64 disengaja), lalu
+        # finalizer murmur3 agar tersebar merata; bottom-k butuh hash yang seragam
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(self.shingle_words):
+            shingles = shingles * np.uint64(1099511628211) + window[offset:offset + count]
+        shingles ^= shingles >> np.uint64(33)
+        shingles *= np.uint64(0xff51afd7ed558ccd)
+        shingles ^= shingles >> np.uint64(33)
+        self._hashes = np.union1d(self._hashes, shingles)[:self.size]
+
+    def values(self) -> List[int]:
+        return self._hashes.tolist()
+
+def sketch_similarity(a: List[int], b: List[int], size: int = SKETCH_SIZE) -> float:
+    """Perkiraan Jaccard dari dua sketsa bottom-k: porsi k hash terkecil gabungan yang ada di keduanya."""
+    if not a or not b:
+        return 0.0
+    set_a, set_b = set(a), set(b)
+    union = sorted(set_a | set_b)[:size]
+    return sum(1 for value in union if value in set_a and value in set_b) / len(union)
+
+class NearDuplicateIndex:
+    """
+    Sketsa dokumen yang sudah selesai dalam satu batch. Kandidat dicari lewat hash yang sama
+    (inverted index), sehingga dokumen baru tidak dibandingkan dengan semua dokumen.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._postings: Dict[int, List[str]] = collections.defaultdict(list)
+        self._sketches: Dict[str, List[int]] = {}
+
+    def add(self, member: str, sketch: List[int]) -> Optional[Tuple[str, float]]:
+        """Daftarkan sketsa. Returns: (member paling mirip, kemiripan) jika >= threshold, atau None."""
+        shared = collections.Counter(other for value in sketch for other in self._postings.get(value, ()))
+        best: Optional[Tuple[str, float]] = None
+        for other, count in shared.items():
+            # Kemiripan >= threshold butuh minimal threshold * k hash yang sama di kedua sketsa
+            if count < self.threshold * max(len(sketch), len(self._sketches[other])):
+                continue
+            similarity = sketch_similarity(sketch, self._sketches[other])
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (other, similarity)
+        for value in sketch:
+            self._postings[value].append(member)
+        self._sketches[member] = sketch
+        return best
+
+class PageCounter:
+    """
+    Menghitung total kata dan keyword halaman demi halaman, tanpa menyimpan teks penuh.
+    page_hits mencatat nomor halaman (mulai 1) tempat tiap kategori ditemukan.
+    Dengan collect_context=True, tiap kemunculan juga dicatat beserta konteksnya (indeks KWIC).
+    """
+
+    def __init__(self, matcher: KeywordMatcher, collect_context: bool = False, sketch: bool = False):
+        self.matcher = matcher
+        self.page_count = 0
+        self.total_words = 0
+        self.counts: Dict[str, int] = dict.fromkeys(matcher.categories, 0)
+        self.page_hits: Dict[str, List[int]] = {}
+        self.context_hits: Optional[List[kwic.Hit]] = [] if collect_context else None
+        # Sketsa shingle untuk deteksi near-duplicate (opsional)
+        self.sketch: Optional[ShingleSketch] = ShingleSketch() if sketch else None
+        # Waktu menunggu halaman dari extractor vs waktu menghitung kata + keyword
+        self.extract_seconds = 0.0
+        self.count_seconds = 0.0
+
+    def _count_with_context(self, text: str) -> Dict[str, int]:
+        page_counts = dict.fromkeys(self.matcher.categories, 0)
+        for key, start, end in self.matcher.iter_matches(text):
+            page_counts[key] += 1
+            if self.counts[key] + page_counts[key] <= kwic.KWIC_MAX_HITS_PER_CATEGORY:
+                self.context_hits.append(kwic.make_hit(key, self.page_count, text, start, end))
+        return page_counts
+
+    def add_page(self, text: str) -> None:
+        self.page_count += 1
+        self.total_words += count_total_words(text)
+        if self.sketch is not None:
+            self.sketch.update(text)
+        page_counts = self.matcher.count(text) if self.context_hits is None else self._count_with_context(text)
+        for key, hits in page_counts.items():
+            if hits:
+                self.counts[key] += hits
+                self.page_hits.setdefault(key, []).append(self.page_count)
+
+    def consume(self, pages: Iterable[str], page_sink: Optional[Callable[[str], None]] = None) -> "PageCounter":
+        iterator = iter(pages)
+        while True:
+            start = time.perf_counter()
+            text = next(iterator, None)
+            extracted = time.perf_counter()
+            self.extract_seconds += extracted - start
+            if text is None:
+                return self
+            self.add_page(text)
+            self.count_seconds += time.perf_counter() - extracted
+            if page_sink:
+                page_sink(text)
+
+def document_key(source: FileSource, include_scanned: bool) -> str:
+    """Key isi dokumen untuk cache hasil dan indeks KWIC."""
+    # Teks file PDF scan bergantung pada opsi OCR, jadi opsi itu (dan mode / ambang OCR adaptif
+    # jika OCR aktif) ikut jadi bagian key; tanpa OCR key tidak berubah
+    parts: Tuple[Any, ...] = (EXTRACTOR_VERSION, include_scanned)
+    if include_scanned:
+        parts += (OCR_MODE, OCR_MIN_CONFIDENCE)
+    if isinstance(source, str):
+        return cache.make_file_key(source, *parts)
+    return cache.make_key(source, *parts)
+
+def _analyze_with_cache(
+    filename: str, 
+    source: FileSource, 
+    key: str,
+    matcher: KeywordMatcher, 
+    include_scanned: bool, 
+    result_cache: cache.ResultCache,
+    metrics: Dict[str, float],
+    collect_context: bool = False,
+    sketch: bool = False
+) -> Tuple[bool, int, Dict[str, int], Dict[str, List[int]], Optional[List[kwic.Hit]], Optional[List[int]]]:
+    """
+    Returns: Tuple -> (Is_Skipped, Total Kata, Counts, Page Hits, Konteks KWIC / None, Sketsa shingle / None)
+    Sketsa (sketch=True) disimpan di entry cache, terlepas dari pattern set.
+    """
+    entry = result_cache.get(key)
+    if entry is not None:
+        metrics["cache_hit"] = 1
+        metrics["pages"] = entry.get("pages", 0)
+        cached = entry["counts"].get(matcher.signature)
+        if entry["skipped"] or (cached is not None and not collect_context and (not sketch or "sketch" in entry)):
+            logger.info(f"[{filename}] Cache HIT.")
+            cached = cached or {}
+            return entry["skipped"], entry["words"], cached.get("counts", {}), cached.get("page_hits", {}), None, entry.get("sketch") if sketch else None
+        pages = result_cache.iter_pages(key)
+        if pages is not None:
+            # Teks sudah ada, hanya pattern set (konteks KWIC / sketsa) yang baru: hitung ulang tanpa ekstraksi
+            logger.info(f"[{filename}] Cache HIT (teks), menghitung ulang keyword.")
+            stats = PageCounter(matcher, collect_context, sketch and "sketch" not in entry).consume(pages)
+            metrics["count_ms"] = stats.count_seconds * 1000
+            if cached is None or stats.sketch is not None:
+                entry["counts"][matcher.signature] = {"counts": stats.counts, "page_hits": stats.page_hits}
+                if stats.sketch is not None:
+                    entry["sketch"] = stats.sketch.values()
+                result_cache.put(key, entry)
+            return False, entry["words"], stats.counts, stats.page_hits, stats.context_hits, entry.get("sketch") if sketch else None
+
+    metrics["cache_hit"] = 0
+    start = time.perf_counter()
+    pages, is_skipped = extract_pages(filename, source, include_scanned, metrics)
+    open_seconds = time.perf_counter() - start
+    if is_skipped:
+        metrics["extract_ms"] = open_seconds * 1000
+        result_cache.put(key, {"skipped": True, "words": 0, "pages": 0, "counts": {}})
+        return True, 0, {}, {}, None, None
+    
+    # Teks per halaman langsung ditulis (stream) ke cache sambil dihitung
+    with result_cache.open_page_writer(key) as writer:
+        stats = PageCounter(matcher, collect_context, sketch).consume(pages, page_sink=writer.write)
+        entry = {
+            "skipped": False,
+            "words": stats.total_words,
+            "pages": stats.page_count,
+            "counts": {matcher.signature: {"counts": stats.counts, "page_hits": stats.page_hits}}
+        }
+        if stats.sketch is not None:
+            entry["sketch"] = stats.sketch.values()
+        if metrics.get("page_errors"):
+            # Teks tidak lengkap (OCR / halaman gagal) tidak di-cache, agar run berikutnya mencoba ulang
+            logger.warning(f"[{filename}] {metrics['page_errors']:.0f} halaman gagal diekstrak, hasil tidak disimpan ke cache.")
+        else:
+            writer.commit(entry)
+    _record_counter_metrics(metrics, stats, open_seconds)
+    return False, stats.total_words, stats.counts, stats.page_hits, stats.context_hits, entry.get("sketch")
+
+def _record_counter_metrics(metrics: Dict[str, float], stats: PageCounter, open_seconds: float) -> None:
+    metrics["pages"] = stats.page_count
+    metrics["extract_ms"] = (open_seconds + stats.extract_seconds) * 1000
+    metrics["count_ms"] = stats.count_seconds * 1000
+
+def document_origin(zip_name: str, filename: str) -> Tuple[str, str]:
+    """(Nama Bank, Tahun): bank = nama arsip terdalam, tahun dari path di dalam arsip itu dulu, lalu dari nama arsip."""
+    # Bukan dari nama arsip luar yang ikut tertulis di member id
+    return archive_stem(zip_name), extract_year(filename.rsplit(f"{zip_name}/", 1)[-1], zip_name)
+
 def analyze_single_file(args: Tuple) -> Dict[str, Any]:
-    zip_name, filename, file_bytes, is_bilingual, include_scanned = args
+    """
+    args: (zip_name, filename, payload, matcher, include_scanned, use_cache, submitted_at,
+    index_context, aliases, sketch, context_batch). aliases = (zip_name, filename) salinan identik
+    yang ikut didaftarkan ke indeks KWIC; sketch=True menambahkan "Sketsa" (near-duplicate) ke
+    hasil; context_batch = id batch (job) yang dicatat bersama file di indeks KWIC.
+    """
+    zip_name, filename, payload, matcher, include_scanned, use_cache, submitted_at, index_context, aliases, sketch, context_batch = args
+    started_at = time.time()
+    start = time.perf_counter()
     
     logger.info(f"[{filename}] Memulai analisis...")
     
-    patterns = PATTERNS_BI if is_bilingual else PATTERNS_EN
-    ext = os.path.splitext(filename)[1].lower()
-    text = ""
-    is_skipped = False
+    # Metrik per file (ms). queue_wait memakai wall clock karena submit & eksekusi bisa beda proses.
+    metrics: Dict[str, float] = {
+        "bytes": 0,
+        "pages": 0,
+        "extract_ms": 0.0,
+        "ocr_ms": 0.0,
+        "ocr_pages": 0,
+        "page_errors": 0,
+        "count_ms": 0.0,
+        "queue_wait_ms": max(0.0, (started_at - submitted_at) * 1000) if submitted_at else 0.0,
+    }
     
-    if ext == '.pdf': 
-        text, is_skipped = read_pdf(file_bytes, filename, include_scanned)
-    elif ext == '.docx': 
-        text = read_docx(file_bytes)
-    elif ext == '.txt': 
-        text = read_txt(file_bytes)
+    result_cache = cache.get_result_cache() if use_cache else None
+    kwic_index = kwic.get_kwic_index() if index_context else None
+    bank_name, year = document_origin(zip_name, filename)
     
-    bank_name = os.path.splitext(zip_name)[0]
-    year = extract_year(filename, zip_name)
+    with spool_payload(payload, filename) as source_path:
+        metrics["bytes"] = os.path.getsize(source_path)
+        doc_key = document_key(source_path, include_scanned) if result_cache is not None or kwic_index is not None else None
+        # Dokumen (isi identik) yang sudah diindeks dengan matcher yang sama tidak dikumpulkan ulang konteksnya
+        collect_context = kwic_index is not None and not kwic_index.is_indexed(doc_key, matcher.signature)
+        if result_cache is not None:
+            is_skipped, total_words, counts, page_hits, context_hits, sketch_values = _analyze_with_cache(
+                filename, source_path, doc_key, matcher, include_scanned, result_cache, metrics, collect_context, sketch
+            )
+        else:
+            extract_start = time.perf_counter()
+            pages, is_skipped = extract_pages(filename, source_path, include_scanned, metrics)
+            open_seconds = time.perf_counter() - extract_start
+            stats = PageCounter(matcher, collect_context, sketch).consume(pages)
+            _record_counter_metrics(metrics, stats, open_seconds)
+            total_words, counts, page_hits, context_hits = stats.total_words, stats.counts, stats.page_hits, stats.context_hits
+            sketch_values = stats.sketch.values() if stats.sketch is not None else None
+    
+    # Halaman yang gagal diekstrak: hitungan hanya sebagian, status bukan SUCCESS
+    is_partial = metrics["page_errors"] > 0
+    
+    if kwic_index is not None and not is_skipped and not is_partial:
+        try:
+            if context_hits is not None:
+                kwic_index.add_document(doc_key, matcher.signature, context_hits)
+            kwic_index.register_file(doc_key, zip_name, filename, bank_name, year, context_batch)
+            for alias_zip, alias_name in aliases:
+                kwic_index.register_file(doc_key, alias_zip, alias_name, *document_origin(alias_zip, alias_name), context_batch)
+        except Exception as e:
+            # Indeks KWIC pelengkap; kegagalan menulis indeks tidak menggagalkan hasil hitungan
+            logger.warning(f"[{filename}] Gagal menulis indeks KWIC: {e}")
+    
+    metrics["total_ms"] = (time.perf_counter() - start) * 1000
+    metrics = {k: round(v, 1) if isinstance(v, float) else v for k, v in metrics.items()}
     
     if is_skipped:
         return {
@@ -210,107 +1492,682 @@ def analyze_single_file(args: Tuple) -> Dict[str, Any]:
             "Tahun": year,
             "Nama File": os.path.basename(filename),
             "Total Kata Dokumen": 0,
-            "Status": "SKIPPED (Scan)"
+            "Status": "SKIPPED (Scan)",
+            "Metrik": metrics
         }
-
-    total_words = count_total_words(text)
-    
-    counts = {}
-    for key, pattern in patterns.items():
-        matches = pattern.findall(text)
-        counts[key] = len(matches)
     
-    logger.info(f"[{filename}] Analisis selesai. Total kata: {total_words}")
+    logger.info(f"[{filename}] Analisis selesai. Total kata: {total_words} ({metrics['total_ms']:.0f} ms)")
     
     row_data = {
         "Nama Bank": bank_name,
         "Tahun": year,
         "Nama File": os.path.basename(filename),
         "Total Kata Dokumen": total_words,
-        "Status": "SUCCESS"
+        "Status": "PARTIAL (Halaman Gagal)" if is_partial else "SUCCESS"
     }
     row_data.update(counts)
+    # Nomor halaman tempat tiap keyword ditemukan (hanya kategori yang muncul)
+    row_data["Halaman Keyword"] = page_hits
+    row_data["Metrik"] = metrics
+    if sketch_values is not None:
+        row_data["Sketsa"] = sketch_values
     
     return row_data
 
+# 4. EKSEKUSI PARALEL
+
+class ZipMemberRef(NamedTuple):
+    """
+    Referensi ringan ke member ZIP di disk. Dikirim ke worker proses sebagai pengganti
+    bytes file, sehingga yang di-pickle hanya dua string dan dekompresi terjadi di worker.
+    """
+    archive_path: str
+    member: str
+
+@contextlib.contextmanager
+def spool_payload(payload: Union[bytes, str, ZipMemberRef], filename: str) -> Iterator[str]:
+    """
+    Tulis payload ke file sementara lalu berikan path-nya; file dihapus setelah blok selesai.
+    Member ZIP didekompresi per blok SPOOL_CHUNK_BYTES langsung ke disk, jadi file besar
+    tidak pernah ada utuh sebagai bytes di heap worker. Payload str adalah file yang sudah
+    ada di disk (isi tar / direktori) dan dipakai langsung tanpa disalin.
+    """
+    if isinstance(payload, str):
+        yield payload
+        return
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1].lower(), dir=SPOOL_DIR)
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            if isinstance(payload, ZipMemberRef):
+                with zipfile.ZipFile(payload.archive_path) as z, z.open(payload.member) as member:
+                    shutil.copyfileobj(member, tmp, SPOOL_CHUNK_BYTES)
+            else:
+                tmp.write(payload)
+        yield path
+    finally:
+        os.remove(path)
+
+class SerialExecutor(concurrent.futures.Executor):
+    """Executor sinkron: menjalankan task langsung di thread pemanggil."""
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+def resolve_worker_count(max_workers: Optional[int] = None) -> int:
+    if max_workers and max_workers > 0:
+        return max_workers
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def _init_worker(log_level: Optional[int], ocr_workers: Optional[int] = None) -> None:
+    global OCR_WORKERS
+    if log_level is not None:
+        configure_logging(log_level)
+    if ocr_workers is not None:
+        OCR_WORKERS = ocr_workers
+
+def create_executor(mode: str = DEFAULT_EXECUTOR_MODE, max_workers: Optional[int] = None) -> concurrent.futures.Executor:
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(f"Executor mode tidak dikenal: {mode!r} (pilihan: {', '.join(EXECUTOR_MODES)})")
+    workers = resolve_worker_count(max_workers)
+    if mode == "serial":
+        return SerialExecutor()
+    if mode == "process":
+        # 'fork' dari proses Streamlit yang multi-thread rawan deadlock, pakai forkserver bila ada
+        import multiprocessing
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        # Worker memakai konfigurasi log proses induk (jika induk sudah memasangnya)
+        root = logging.getLogger()
+        log_level = root.getEffectiveLevel() if root.handlers else None
+        # Thread OCR default dibagi antar worker proses; WORDCOUNTER_OCR_WORKERS eksplisit tidak diubah
+        ocr_workers = None if os.environ.get("WORDCOUNTER_OCR_WORKERS") else max(1, min(OCR_WORKERS, (os.cpu_count() or 1) // workers))
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(log_level, ocr_workers)
+        )
+    return concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+def _archive_name(uploaded_zip: Any) -> str:
+    if isinstance(uploaded_zip, (str, os.PathLike)):
+        return os.path.basename(os.path.normpath(os.fspath(uploaded_zip)))
+    return getattr(uploaded_zip, "name", "archive.zip")
+
+def _spool_archive(uploaded_zip: Any) -> Tuple[str, bool]:
+    """
+    Pastikan arsip tersedia sebagai file di disk agar worker (thread maupun proses) bisa
+    membuka member-nya sendiri. Returns: Tuple[str, bool] -> (Path, Harus_Dihapus)
+    """
+    if isinstance(uploaded_zip, (str, os.PathLike)):
+        return os.fspath(uploaded_zip), False
+    uploaded_zip.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(_archive_name(uploaded_zip))[1] or ".zip", delete=False) as tmp:
+        shutil.copyfileobj(uploaded_zip, tmp, 1024 * 1024)
+    uploaded_zip.seek(0)
+    return tmp.name, True
+
+def archive_kind(name: str) -> Optional[str]:
+    """'zip', 'tar' (termasuk .tar.gz/.tgz), atau None jika bukan arsip."""
+    lower = name.lower()
+    if lower.endswith('.zip'):
+        return "zip"
+    if lower.endswith(('.tar', '.tar.gz', '.tgz')):
+        return "tar"
+    return None
+
+def archive_stem(name: str) -> str:
+    """Nama arsip tanpa ekstensi (termasuk .tar.gz), dipakai sebagai Nama Bank."""
+    base = os.path.basename(name)
+    for ext in ARCHIVE_EXTENSIONS:
+        if base.lower().endswith(ext):
+            return base[:-len(ext)]
+    return os.path.splitext(base)[0]
+
+def _is_target_member(name: str) -> bool:
+    return not name.endswith('/') and '__MACOSX' not in name
+
+def _container_kind(path: str, name: str) -> str:
+    """Jenis arsip teratas: dari ekstensi, atau dari isi file jika namanya tidak jelas (mis. upload tanpa ekstensi)."""
+    if os.path.isdir(path):
+        return "dir"
+    kind = archive_kind(name)
+    if kind:
+        return kind
+    if zipfile.is_zipfile(path):
+        return "zip"
+    if tarfile.is_tarfile(path):
+        return "tar"
+    raise zipfile.BadZipFile(f"Format arsip tidak dikenali: {name}")
+
+def list_target_members(z: zipfile.ZipFile) -> List[str]:
+    """Member ZIP yang akan dianalisis (format didukung, tanpa direktori dan metadata macOS)."""
+    return [f for f in z.namelist() if _is_target_member(f) and is_supported_document(f)]
+
+def list_archive_documents(source: Union[str, IO[bytes]], name: Optional[str] = None, prefix: str = "", depth: int = 0) -> List[str]:
+    """
+    Member id semua dokumen di arsip (termasuk arsip bertingkat) tanpa mengekstrak ke disk;
+    id sama dengan ArchiveDocument.member hasil ArchiveExpander. Dipakai untuk total progres job.
+    """
+    name = name or _archive_name(source)
+    kind = _container_kind(source, name) if depth == 0 and isinstance(source, str) else archive_kind(name)
+    members: List[str] = []
+    if kind == "dir":
+        for rel_path in _walk_directory(source):
+            full_path = os.path.join(source, rel_path)
+            if is_supported_document(rel_path):
+                members.append(prefix + rel_path)
+            elif archive_kind(rel_path):
+                members.extend(list_archive_documents(full_path, os.path.basename(rel_path), f"{prefix}{rel_path}/", depth))
+    elif kind == "zip":
+        with zipfile.ZipFile(source) as z:
+            for info in z.infolist():
+                if not _is_target_member(info.filename):
+                    continue
+                if is_supported_document(info.filename):
+                    members.append(prefix + info.filename)
+                elif archive_kind(info.filename) and depth < MAX_ARCHIVE_DEPTH:
+                    # ZipExtFile bisa di-seek, jadi ZIP/tar dalam dibaca langsung dari stream
+                    with z.open(info) as inner:
+                        members.extend(list_archive_documents(inner, info.filename, f"{prefix}{info.filename}/", depth + 1))
+    else:
+        # Tar dibaca sebagai stream (r|*): cukup satu lintasan, juga untuk tar di dalam arsip lain
+        open_args = {"name": source} if isinstance(source, str) else {"fileobj": source}
+        with tarfile.open(mode="r|*", **open_args) as t:
+            for info in t:
+                member_name = posixpath.normpath(info.name)
+                if not info.isfile() or not _is_target_member(member_name):
+                    continue
+                if is_supported_document(member_name):
+                    members.append(prefix + member_name)
+                elif archive_kind(member_name) and depth < MAX_ARCHIVE_DEPTH:
+                    inner = t.extractfile(info)
+                    if archive_kind(member_name) == "zip":
+                        # ZipFile butuh seek, stream tar tidak: salin dulu ke file sementara
+                        with tempfile.TemporaryFile(dir=SPOOL_DIR) as tmp:
+                            shutil.copyfileobj(inner, tmp, SPOOL_CHUNK_BYTES)
+                            tmp.seek(0)
+                            members.extend(list_archive_documents(tmp, member_name, f"{prefix}{member_name}/", depth + 1))
+                    else:
+                        members.extend(list_archive_documents(inner, member_name, f"{prefix}{member_name}/", depth + 1))
+    return members
+
+def _walk_directory(path: str) -> List[str]:
+    """Path relatif (pemisah '/') semua file di direktori, urut dan deterministik."""
+    rel_paths = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for f in sorted(files):
+            rel_paths.append(os.path.relpath(os.path.join(root, f), path).replace(os.sep, "/"))
+    return [p for p in rel_paths if _is_target_member(p)]
+
+class ArchiveDocument(NamedTuple):
+    """Satu dokumen hasil perataan arsip bertingkat."""
+    member: str         # id unik di batch, mis. "BankA.zip/AR 2021.pdf" (dokumen di arsip teratas: nama member apa adanya)
+    archive_name: str   # nama arsip terdalam yang memuat dokumen, sumber Nama Bank & Tahun
+    payload: Union[str, ZipMemberRef, None]  # None = dilewati (sudah selesai sebelumnya)
+    # (ukuran, CRC-32 dari central directory ZIP atau None untuk tar/direktori): kandidat duplikat
+    fingerprint: Optional[Tuple[int, Optional[int]]] = None
+
+class ArchiveExpander:
+    """
+    Meratakan arsip bertingkat (ZIP/tar berisi ZIP/tar per bank, atau direktori berisi
+    banyak arsip) menjadi daftar dokumen.
+
+    - Dokumen di dalam ZIP tidak diekstrak di sini; worker membukanya sendiri (ZipMemberRef),
+      sehingga dekompresi dokumen tetap paralel di pool analisis.
+    - Arsip dalam diekstrak ke `workdir` lalu ditelusuri lagi, paralel antar arsip
+      (EXPAND_WORKERS thread), sampai MAX_ARCHIVE_DEPTH.
+    - Tar tidak bisa dibaca acak, jadi dokumennya diekstrak berurutan ke `workdir`.
+
+    Semua salinan di-stream per SPOOL_CHUNK_BYTES (memori per thread konstan) dan total byte
+    yang diekstrak dibatasi `max_bytes`.
+    """
+
+    def __init__(self, workdir: str, skip_members: Optional[Collection[str]] = None, max_bytes: int = MAX_EXPANDED_BYTES):
+        self.workdir = workdir
+        self.skip_members = skip_members or ()
+        self.max_bytes = max_bytes
+        self.expanded_bytes = 0
+        self._lock = threading.Lock()
+        self._pool: Optional[concurrent.futures.Executor] = None
+
+    def expand(self, path: str, name: str) -> List[ArchiveDocument]:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=EXPAND_WORKERS, thread_name_prefix="expand") as pool:
+            self._pool = pool
+            return self._flatten(self._expand(path, name, "", 0, _container_kind(path, name)))
+
+    def _flatten(self, entries: List[Any]) -> List[ArchiveDocument]:
+        # Future = arsip dalam yang diekspansi thread lain; urutan hasil tetap mengikuti urutan arsip
+        documents: List[ArchiveDocument] = []
+        for entry in entries:
+            if isinstance(entry, concurrent.futures.Future):
+                documents.extend(self._flatten(entry.result()))
+            else:
+                documents.append(entry)
+        return documents
+
+    def _document(
+        self,
+        member: str,
+        archive_name: str,
+        payload: Callable[[], Union[str, ZipMemberRef]],
+        fingerprint: Optional[Tuple[int, Optional[int]]] = None
+    ) -> ArchiveDocument:
+        return ArchiveDocument(member, archive_name, None if member in self.skip_members else payload(), fingerprint)
+
+    def _spool(self, src: IO[bytes], size: int, name: str) -> str:
+        with self._lock:
+            self.expanded_bytes += size
+            if self.expanded_bytes > self.max_bytes:
+                raise ValueError(
+                    f"Ekstraksi arsip melebihi batas {self.max_bytes // (1024 * 1024)} MB "
+                    "(WORDCOUNTER_MAX_EXPANDED_MB)"
+                )
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(name)[1].lower(), dir=self.workdir)
+        with os.fdopen(fd, "wb") as dest:
+            shutil.copyfileobj(src, dest, SPOOL_CHUNK_BYTES)
+        return path
+
+    def _expand_inner(self, zip_path: str, info: zipfile.ZipInfo, member: str, depth: int) -> List[Any]:
+        # Tiap thread membuka ZipFile sendiri: dekompresi arsip dalam berjalan paralel
+        with zipfile.ZipFile(zip_path) as z, z.open(info) as src:
+            inner_path = self._spool(src, info.file_size, info.filename)
+        return self._expand(inner_path, info.filename, member + "/", depth, archive_kind(info.filename))
+
+    def _expand(self, path: str, name: str, prefix: str, depth: int, kind: Optional[str]) -> List[Any]:
+        archive_name = os.path.basename(name)
+        entries: List[Any] = []
+        if kind == "dir":
+            # Direktori (mis. beberapa arsip dalam satu job) bukan arsip: kedalaman tidak bertambah
+            for rel_path in _walk_directory(path):
+                full_path = os.path.join(path, rel_path)
+                if is_supported_document(rel_path):
+                    entries.append(self._document(prefix + rel_path, archive_name, lambda: full_path, (os.path.getsize(full_path), None)))
+                elif archive_kind(rel_path):
+                    entries.append(self._pool.submit(
+                        self._expand, full_path, os.path.basename(rel_path), f"{prefix}{rel_path}/", depth, archive_kind(rel_path)
+                    ))
+        elif kind == "zip":
+            with zipfile.ZipFile(path) as z:
+                infos = z.infolist()
+            for info in infos:
+                if not _is_target_member(info.filename):
+                    continue
+                member = prefix + info.filename
+                if is_supported_document(info.filename):
+                    entries.append(self._document(member, archive_name, lambda: ZipMemberRef(path, info.filename), (info.file_size, info.CRC)))
+                elif archive_kind(info.filename):
+                    if depth < MAX_ARCHIVE_DEPTH:
+                        entries.append(self._pool.submit(self._expand_inner, path, info, member, depth + 1))
+                    else:
+                        logger.warning(f"[{member}] Dilewati: arsip bertingkat lebih dari {MAX_ARCHIVE_DEPTH} level.")
+        else:
+            with tarfile.open(path, "r:*") as t:
+                for info in t:
+                    member_name = posixpath.normpath(info.name)
+                    if not info.isfile() or not _is_target_member(member_name):
+                        continue
+                    member = prefix + member_name
+                    if is_supported_document(member_name):
+                        entries.append(self._document(
+                            member, archive_name, lambda: self._spool(t.extractfile(info), info.size, member_name), (info.size, None)
+                        ))
+                    elif archive_kind(member_name):
+                        if depth < MAX_ARCHIVE_DEPTH:
+                            inner_path = self._spool(t.extractfile(info), info.size, member_name)
+                            entries.append(self._pool.submit(
+                                self._expand, inner_path, member_name, member + "/", depth + 1, archive_kind(member_name)
+                            ))
+                        else:
+                            logger.warning(f"[{member}] Dilewati: arsip bertingkat lebih dari {MAX_ARCHIVE_DEPTH} level.")
+        return entries
+
+def _payload_digest(payload: Union[str, ZipMemberRef]) -> str:
+    with contextlib.ExitStack() as stack:
+        if isinstance(payload, ZipMemberRef):
+            src = stack.enter_context(stack.enter_context(zipfile.ZipFile(payload.archive_path)).open(payload.member))
+        else:
+            src = stack.enter_context(open(payload, "rb"))
+        digest = hashlib.sha256()
+        for chunk in iter(functools.partial(src.read, SPOOL_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def group_duplicate_documents(documents: List[ArchiveDocument]) -> List[Tuple[ArchiveDocument, List[ArchiveDocument]]]:
+    """
+    Kelompokkan dokumen berisi identik sebelum dispatch. Kandidat = ukuran sama; CRC-32 dari
+    central directory ZIP (tanpa membaca isi) menyaring kandidat, dan hanya yang masih
+    bertabrakan di-hash isinya (SHA-256) untuk memastikan.
+    Returns: [(dokumen yang dianalisis, salinan identiknya)] sesuai urutan dokumen.
+    """
+    by_size: Dict[int, List[ArchiveDocument]] = collections.defaultdict(list)
+    for doc in documents:
+        if doc.fingerprint is not None:
+            by_size[doc.fingerprint[0]].append(doc)
+    content: Dict[str, str] = {}
+    for candidates in by_size.values():
+        if len(candidates) < 2:
+            continue
+        crcs = collections.Counter(doc.fingerprint[1] for doc in candidates)
+        for doc in candidates:
+            crc = doc.fingerprint[1]
+            # CRC unik di antara kandidat yang semuanya punya CRC = pasti berbeda isi
+            if crc is not None and None not in crcs and crcs[crc] == 1:
+                continue
+            content[doc.member] = _payload_digest(doc.payload)
+
+    groups: Dict[Tuple[str, str], Tuple[ArchiveDocument, List[ArchiveDocument]]] = {}
+    for doc in documents:
+        key = ("sha256", content[doc.member]) if doc.member in content else ("member", doc.member)
+        if key in groups:
+            groups[key][1].append(doc)
+        else:
+            groups[key] = (doc, [])
+    return list(groups.values())
+
+def duplicate_result(row: Dict[str, Any], doc: ArchiveDocument, original: str) -> Dict[str, Any]:
+    """Baris hasil salinan identik: hitungan dari dokumen yang dianalisis, bank/tahun/nama dari path salinan."""
+    data = dict(row)
+    data["Nama File"] = os.path.basename(doc.member)
+    if "Nama Bank" in row:
+        data["Nama Bank"], data["Tahun"] = document_origin(doc.archive_name, doc.member)
+    data["Duplikat Dari"] = original
+    # Tanpa metrik waktu: salinan tidak dianalisis, ringkasan p50/p90 hanya dari file yang benar-benar diproses
+    data["Metrik"] = {"bytes": row.get("Metrik", {}).get("bytes", 0), "duplicate": 1}
+    return data
+
 def process_zip_file(
     uploaded_zip: Any, 
     is_bilingual: bool = False, 
     include_scanned: bool = False, 
-    progress_callback: Optional[Callable[[int, int, str], None]] = None
+    progress_callback: Optional[Callable[[int, int, str], None]] = None,
+    executor_mode: str = DEFAULT_EXECUTOR_MODE,
+    max_workers: Optional[int] = DEFAULT_MAX_WORKERS,
+    use_cache: bool = True,
+    executor: Optional[concurrent.futures.Executor] = None,
+    matcher: Optional[KeywordMatcher] = None,
+    skip_members: Optional[Collection[str]] = None,
+    result_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    index_context: bool = False,
+    dedupe: bool = DEDUPE_DOCUMENTS,
+    detect_near_duplicates: bool = NEAR_DUPLICATE_DETECTION,
+    context_batch: Optional[str] = None
 ) -> List[Dict[str, Any]]:
+    """
+    progress_callback selalu dipanggil dari proses/thread pemanggil (bukan dari worker),
+    sehingga aman dipakai untuk update UI Streamlit di semua executor_mode.
+    result_callback(member, row) juga dipanggil dari thread pemanggil segera setelah tiap
+    file selesai, sebelum progress_callback (dipakai untuk checkpoint job).
     
-    logger.info(f"Membuka ZIP: {uploaded_zip.name}")
-    files_to_process = []
+    Member di `skip_members` (sudah selesai pada run sebelumnya) tidak diproses dan tidak
+    ada di hasil, tetapi tetap dihitung di progres (current/total).
     
-    with zipfile.ZipFile(uploaded_zip) as z:
-        all_files = z.namelist()
-        valid_extensions = ['.pdf', '.docx', '.txt']
+    Jika `executor` diberikan (pool bersama untuk banyak ZIP), executor_mode diabaikan
+    dan pool tidak di-shutdown di akhir; pemanggil yang mengelola umurnya.
+    
+    Jika `matcher` diberikan (dictionary custom), is_bilingual diabaikan.
+    
+    `uploaded_zip` boleh ZIP, tar/tar.gz, atau direktori berisi beberapa arsip, termasuk arsip
+    bertingkat (ZIP berisi ZIP per bank). Nama Bank & Tahun diambil dari arsip terdalam yang
+    memuat dokumen; member di skip_members/result_callback memakai id ArchiveDocument.member.
+    
+    index_context=True mencatat setiap kemunculan keyword + konteksnya ke indeks KWIC
+    (lihat kwic.py) sehingga bisa dicari tanpa membuka ulang dokumen; context_batch (mis. job id)
+    mencatat file batch ini agar pencarian bisa dibatasi ke batch tersebut.
+    
+    dedupe=True: dokumen berisi identik dalam batch dianalisis sekali; setiap salinan tetap
+    mendapat baris sendiri (bank/tahun dari path-nya, "Duplikat Dari" = member yang dianalisis).
+    detect_near_duplicates=True: dokumen yang teksnya hampir sama dengan dokumen lain di batch
+    ini (sketsa shingle, >= NEAR_DUPLICATE_THRESHOLD) diberi "Mirip Dengan" dan "Kemiripan".
+    """
+    if matcher is None:
+        matcher = get_keyword_matcher(is_bilingual)
+    zip_name = _archive_name(uploaded_zip)
+    if executor is not None:
+        # Executor pembungkus (mis. antrean job bersama) menyebutkan mode pool di belakangnya
+        executor_mode = getattr(executor, "executor_mode", None) or (
+            "process" if isinstance(executor, concurrent.futures.ProcessPoolExecutor) else "thread"
+        )
+    logger.info(f"Membuka arsip: {zip_name} (mode: {executor_mode})")
+    # Arsip selalu di disk: worker membuka member sendiri (streaming ke file spool) di semua mode
+    archive_path, is_temp_archive = _spool_archive(uploaded_zip)
+    workdir = tempfile.mkdtemp(prefix="wordcounter-", dir=SPOOL_DIR)
+    
+    results_list = []
+    try:
+        documents = ArchiveExpander(workdir, skip_members).expand(archive_path, zip_name)
+        total_files = len(documents)
+        logger.info(f"Ditemukan {total_files} file valid untuk diproses.")
         
-        target_files = [
-            f for f in all_files 
-            if not f.endswith('/') and '__MACOSX' not in f and os.path.splitext(f)[1].lower() in valid_extensions
-        ]
+        target_files = [doc for doc in documents if doc.payload is not None]
+        completed_count = total_files - len(target_files)
+        if completed_count:
+            logger.info(f"{completed_count} file sudah selesai sebelumnya, dilewati.")
         
-        logger.info(f"Ditemukan {len(target_files)} file valid untuk diproses.")
+        if not target_files:
+            return []
         
-        for filename in target_files:
-            with z.open(filename) as f:
-                content = f.read()
-                files_to_process.append((uploaded_zip.name, filename, content, is_bilingual, include_scanned))
-    
-    results_list = []
-    total_files = len(files_to_process)
-    
-    if total_files == 0:
-        return []
+        groups = group_duplicate_documents(target_files) if dedupe else [(doc, []) for doc in target_files]
+        copies = {doc.member: duplicates for doc, duplicates in groups if duplicates}
+        if copies:
+            logger.info(f"{sum(map(len, copies.values()))} file identik dengan file lain, dianalisis sekali.")
+        near_duplicates = NearDuplicateIndex() if detect_near_duplicates else None
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-        future_to_file = {
-            executor.submit(analyze_single_file, args): args[1] 
-            for args in files_to_process
-        }
-        
-        completed_count = 0
-        for future in concurrent.futures.as_completed(future_to_file):
-            filename = future_to_file[future]
-            try:
-                data = future.result()
-                results_list.append(data)
-            except Exception as e:
-                logger.error(f"[{filename}] Exception unhandled: {e}")
-                results_list.append({
-                    "Nama File": os.path.basename(filename),
-                    "Status": "ERROR",
-                    "Total Kata Dokumen": 0
-                })
+        max_in_flight = MAX_IN_FLIGHT_PER_WORKER * (1 if executor_mode == "serial" else resolve_worker_count(max_workers))
+        pending: Dict[concurrent.futures.Future, str] = {}
+
+        def record(filename: str, data: Dict[str, Any]) -> None:
+            nonlocal completed_count
+            results_list.append(data)
+            if result_callback:
+                result_callback(filename, data)
             
             completed_count += 1
             if progress_callback:
                 progress_callback(completed_count, total_files, filename)
+
+        def collect(return_when: str) -> None:
+            done, _ = concurrent.futures.wait(pending, return_when=return_when)
+            for future in done:
+                filename = pending.pop(future)
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logger.error(f"[{filename}] Exception unhandled: {e}")
+                    data = {
+                        "Nama File": os.path.basename(filename),
+                        "Status": "ERROR",
+                        "Total Kata Dokumen": 0
+                    }
+                sketch = data.pop("Sketsa", None)
+                if near_duplicates is not None and sketch:
+                    similar = near_duplicates.add(filename, sketch)
+                    if similar:
+                        logger.info(f"[{filename}] Mirip dengan {similar[0]} (kemiripan {similar[1]:.2f}).")
+                        data["Mirip Dengan"], data["Kemiripan"] = similar[0], round(similar[1], 3)
+                record(filename, data)
+                for copy in copies.get(filename, ()):
+                    record(copy.member, duplicate_result(data, copy, filename))
+
+        pool_context = contextlib.nullcontext(executor) if executor else create_executor(executor_mode, max_workers)
+        with pool_context as pool:
+            # Antrean in-flight dibatasi; worker membuka member ZIP / file hasil ekstraksi sendiri
+            for doc, duplicates in groups:
+                while len(pending) >= max_in_flight:
+                    collect(concurrent.futures.FIRST_COMPLETED)
+                aliases = tuple((copy.archive_name, copy.member) for copy in duplicates)
+                args = (doc.archive_name, doc.member, doc.payload, matcher, include_scanned, use_cache, time.time(), index_context, aliases, detect_near_duplicates, context_batch)
+                pending[pool.submit(analyze_single_file, args)] = doc.member
+            
+            while pending:
+                collect(concurrent.futures.ALL_COMPLETED)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if is_temp_archive:
+            os.remove(archive_path)
                 
-    logger.info("Semua file selesai diproses.")
+    total_ms = summarize_metrics(results_list).get("total_ms")
+    if total_ms:
+        logger.info(f"Semua file selesai diproses. Waktu per file p50 {total_ms['p50']:.0f} ms, p90 {total_ms['p90']:.0f} ms, max {total_ms['max']:.0f} ms.")
+    else:
+        logger.info("Semua file selesai diproses.")
     return results_list
 
-def generate_csv_output(results_list: List[Dict[str, Any]]) -> str:
+METRIC_FIELDS = ["bytes", "pages", "classify_ms", "extract_ms", "ocr_ms", "ocr_pages", "ocr_retries", "page_errors", "count_ms", "queue_wait_ms", "total_ms"]
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    # Nearest-rank, cukup untuk ringkasan tanpa dependensi numpy
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-pct * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize_metrics(results_list: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """
+    Ringkasan batch dari kolom 'Metrik' tiap baris: count, sum, mean, p50, p90, p99, max per metrik.
+    """
+    summary: Dict[str, Dict[str, float]] = {}
+    rows = [row["Metrik"] for row in results_list if row.get("Metrik")]
+    for field in METRIC_FIELDS:
+        values = sorted(float(m[field]) for m in rows if field in m)
+        if not values:
+            continue
+        total = sum(values)
+        summary[field] = {
+            "count": len(values),
+            "sum": round(total, 1),
+            "mean": round(total / len(values), 1),
+            "p50": _percentile(values, 50),
+            "p90": _percentile(values, 90),
+            "p99": _percentile(values, 99),
+            "max": values[-1],
+        }
+    if rows:
+        summary["cache_hit"] = {"count": len(rows), "sum": sum(m.get("cache_hit", 0) for m in rows)}
+        duplicates = sum(m.get("duplicate", 0) for m in rows)
+        if duplicates:
+            summary["duplicate"] = {"count": len(rows), "sum": duplicates}
+    return summary
+
+def export_metrics_json(results_list: List[Dict[str, Any]]) -> str:
+    files = [
+        {"Nama Bank": row.get("Nama Bank"), "Nama File": row.get("Nama File"), "Status": row.get("Status"), **row["Metrik"]}
+        for row in results_list if row.get("Metrik")
+    ]
+    return json.dumps({"summary": summarize_metrics(results_list), "files": files}, indent=2)
+
+# 5. EKSPOR HASIL
+
+TEXT_COLUMNS = ["Nama Bank", "Tahun", "Nama File", "Status"]
+# Kolom opsional (dedupe / near-duplicate), ditulis setelah Total Kata Dokumen
+DUPLICATE_COLUMNS = ["Duplikat Dari", "Mirip Dengan", "Kemiripan"]
+EXPORT_BATCH_ROWS = 10000
+
+def get_export_columns(keyword_headers: Optional[List[str]] = None, duplicate_columns: bool = False) -> Tuple[List[str], List[str]]:
+    """
+    Returns: Tuple[List[str], List[str]] -> (Header lengkap, Kolom keyword)
+    """
+    keyword_headers = list(BASE_PATTERNS.keys()) if keyword_headers is None else keyword_headers
+    return TEXT_COLUMNS + keyword_headers + ["Total Kata Dokumen"] + (DUPLICATE_COLUMNS if duplicate_columns else []), keyword_headers
+
+def has_duplicate_columns(results_list: List[Dict[str, Any]]) -> bool:
+    """True jika ada baris dengan Duplikat Dari / Mirip Dengan, sehingga ekspor perlu DUPLICATE_COLUMNS."""
+    return any(column in row for row in results_list for column in DUPLICATE_COLUMNS)
+
+def _duplicate_values(row: Dict[str, Any]) -> List[Any]:
+    similarity = row.get("Kemiripan")
+    return [row.get("Duplikat Dari") or "", row.get("Mirip Dengan") or "", float(similarity) if similarity is not None else None]
+
+def _export_values(row: Dict[str, Any], keyword_headers: List[str]) -> List[Any]:
+    values: List[Any] = [
+        str(row.get("Nama Bank", "")),
+        str(row.get("Tahun", "")),
+        str(row.get("Nama File", "")),
+        str(row.get("Status", "UNKNOWN")),
+    ]
+    if row.get("Status") == "SKIPPED (Scan)":
+        values.extend(0 for _ in keyword_headers)
+    else:
+        values.extend(int(row.get(kw, 0) or 0) for kw in keyword_headers)
+    values.append(int(row.get("Total Kata Dokumen", 0) or 0))
+    return values
+
+def write_csv_output(
+    results: Iterable[Dict[str, Any]], 
+    output: IO[str], 
+    keyword_headers: Optional[List[str]] = None, 
+    duplicate_columns: bool = False
+) -> int:
+    """
+    Menulis CSV baris demi baris ke file/buffer teks (linear, tanpa membangun string besar).
+    Kolom teks selalu di-quote dan tanda kutip di dalamnya di-escape sesuai RFC 4180.
+    duplicate_columns=True menambahkan DUPLICATE_COLUMNS (Kemiripan kosong jika tidak ada).
+    Returns: jumlah baris data yang ditulis.
+    """
+    header, keyword_headers = get_export_columns(keyword_headers, duplicate_columns)
+    csv.writer(output, lineterminator="\n").writerow(header)
+    writer = csv.writer(output, quoting=csv.QUOTE_NONNUMERIC, lineterminator="\n")
+    written = 0
+    for row in results:
+        values = _export_values(row, keyword_headers)
+        if duplicate_columns:
+            values.extend(_duplicate_values(row))
+        writer.writerow(values)
+        written += 1
+    return written
+
+def generate_csv_output(results_list: List[Dict[str, Any]], keyword_headers: Optional[List[str]] = None) -> str:
     if not results_list: return ""
-    keyword_headers = list(BASE_PATTERNS.keys())
-    header = ["Nama Bank", "Tahun", "Nama File", "Status"] + keyword_headers + ["Total Kata Dokumen"]
-    csv_str = ",".join(header) + "\n"
-    for row in results_list:
-        line = []
-        line.append(f'"{row.get("Nama Bank", "")}"')
-        line.append(f'"{row.get("Tahun", "")}"')
-        line.append(f'"{row.get("Nama File", "")}"')
-        line.append(f'"{row.get("Status", "UNKNOWN")}"')
-        
-        if row.get("Status") == "SKIPPED (Scan)":
-            for _ in keyword_headers: line.append("0")
-        else:
-            for kw in keyword_headers:
-                line.append(str(row.get(kw, 0)))
-                
-        line.append(str(row.get("Total Kata Dokumen", 0)))
-        csv_str += ",".join(line) + "\n"
+    buffer = io.StringIO()
+    write_csv_output(results_list, buffer, keyword_headers, has_duplicate_columns(results_list))
+    return buffer.getvalue()
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def write_parquet_output(
+    results: Iterable[Dict[str, Any]], 
+    output: Any, 
+    keyword_headers: Optional[List[str]] = None, 
+    duplicate_columns: bool = False
+) -> int:
+    """
+    Menulis hasil sebagai Parquet (kolumnar) per batch EXPORT_BATCH_ROWS baris, sehingga
+    memori tambahan konstan. `output` bisa path atau file-like biner. Butuh pyarrow (opsional).
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Export Parquet membutuhkan pyarrow (pip install pyarrow).") from e
 
-    return csv_str
+    header, keyword_headers = get_export_columns(keyword_headers)
+    schema = pa.schema(
+        [(name, pa.string()) for name in TEXT_COLUMNS]
+        + [(name, pa.int64()) for name in header[len(TEXT_COLUMNS):]]
+        + ([("Duplikat Dari", pa.string()), ("Mirip Dengan", pa.string()), ("Kemiripan", pa.float64())] if duplicate_columns else [])
+    )
+    written = 0
+    with pq.ParquetWriter(output, schema, compression="zstd") as writer:
+        batch: List[List[Any]] = []
+        for row in itertools.chain(results, [None]):
+            if row is not None:
+                values = _export_values(row, keyword_headers)
+                if duplicate_columns:
+                    values.extend(_duplicate_values(row))
+                batch.append(values)
+            if batch and (row is None or len(batch) >= EXPORT_BATCH_ROWS):
+                columns = list(zip(*batch))
+                writer.write_batch(pa.record_batch([pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema))
+                written += len(batch)
+                batch = []
+    return written